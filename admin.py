@@ -0,0 +1,120 @@
+import ipaddress
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+ADMIN_HOST = os.getenv('ADMIN_HOST', '127.0.0.1')
+ADMIN_PORT = int(os.getenv('ADMIN_PORT', 0))
+
+ACTIONS = ('poll', 'pause', 'resume')
+
+
+class AdminHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов админки.
+
+    GET /            сводка: пользователи, очередь уведомлений, боты;
+    GET /tenants/X   состояние одного пользователя;
+    POST /tenants/X/poll|pause|resume  команды обработчику опроса.
+
+    Ответы собираются из структур в памяти без блокировок цикла опроса,
+    а команды выполняются самим циклом на следующем шаге.
+    """
+
+    def _reply(self, status, data):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parts(self):
+        return [part for part in self.path.split('?')[0].split('/') if part]
+
+    def do_GET(self):
+        """Отдаёт состояние обработчика."""
+        worker = self.server.worker
+        parts = self._parts()
+        if not parts:
+            return self._reply(HTTPStatus.OK, worker.describe())
+        if len(parts) == 2 and parts[0] == 'tenants':
+            tenant = worker.describe_tenant(parts[1])
+            if tenant is None:
+                return self._reply(
+                    HTTPStatus.NOT_FOUND, {'error': 'unknown tenant'}
+                )
+            return self._reply(HTTPStatus.OK, tenant)
+        return self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+
+    def do_POST(self):
+        """Передаёт команду обработчику опроса."""
+        worker = self.server.worker
+        parts = self._parts()
+        if (
+            len(parts) != 3 or parts[0] != 'tenants'
+            or parts[2] not in ACTIONS
+        ):
+            return self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+        if parts[1] not in worker.registry.tenants:
+            return self._reply(
+                HTTPStatus.NOT_FOUND, {'error': 'unknown tenant'}
+            )
+        if not worker.command(parts[1], parts[2]):
+            return self._reply(
+                HTTPStatus.CONFLICT, {'error': 'tenant is quarantined'}
+            )
+        return self._reply(
+            HTTPStatus.ACCEPTED, {'tenant': parts[1], 'action': parts[2]}
+        )
+
+    def log_message(self, format, *args):
+        """Пишет запросы в общий лог вместо stderr."""
+        logger.debug(f'Админка: {format % args}')
+
+
+def is_loopback(host):
+    """Доступен ли адрес только с этой машины."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class AdminServer(ThreadingHTTPServer):
+    """HTTP-сервер админки, привязанный к обработчику опроса.
+
+    Команды не требуют авторизации, поэтому сервер слушает только
+    loopback; для другого адреса выбрасывается ValueError.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, worker, host=ADMIN_HOST, port=ADMIN_PORT):
+        if not is_loopback(host):
+            raise ValueError(f'Админка слушает только loopback, не {host}.')
+        super().__init__((host, port), AdminHandler)
+        self.worker = worker
+
+
+def start(worker, host=ADMIN_HOST, port=ADMIN_PORT):
+    """Запускает админку в фоновом потоке; без ADMIN_PORT не делает ничего."""
+    if not port:
+        return None
+    try:
+        server = AdminServer(worker, host, port)
+    except ValueError as error:
+        logger.error(f'Админка не запущена: {error}')
+        return None
+    thread = threading.Thread(
+        target=server.serve_forever, name='admin', daemon=True
+    )
+    thread.start()
+    logger.info(f'Админка слушает {host}:{server.server_address[1]}.')
+    return server
@@ -0,0 +1,129 @@
+"""Сравнение пакетного поиска изменений статусов с поэлементным.
+
+На каждом размере пачки сохраняется исходное состояние, затем у доли
+работ меняется статус и замеряется поиск изменившихся записей.
+
+    python bench_diff.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import random
+import timeit
+
+import diffing
+import homework
+
+STATUSES = list(homework.HOMEWORK_VERDICTS)
+
+
+def make_batch(size, tenants, changes, seed=0):
+    """Работы по пользователям и две версии статусов.
+
+    Версии отличаются в доле changes.
+    """
+    rng = random.Random(seed)
+    names = {f'tenant{number}': [] for number in range(tenants)}
+    for number in range(size):
+        names[f'tenant{number % tenants}'].append(f'project{number}')
+    keys = [(tenant, name) for tenant in names for name in names[tenant]]
+    before = [rng.choice(STATUSES) for _ in range(size)]
+    after = list(before)
+    for number in rng.sample(range(size), int(size * changes)):
+        after[number] = STATUSES[
+            (STATUSES.index(after[number]) + 1) % len(STATUSES)
+        ]
+    return names, keys, before, after
+
+
+def fresh(data):
+    """Копия данных с новыми строками, как после разбора ответа API."""
+    return json.loads(json.dumps(data))
+
+
+def bench_naive(names, keys, before, after, repeat):
+    """Поэлементное сравнение со словарём последних статусов."""
+    def setup():
+        return dict(zip(keys, before)), [
+            (tenant, name)
+            for tenant, tenant_names in fresh(names).items()
+            for name in tenant_names
+        ], fresh(after)
+
+    def measure():
+        previous, batch_keys, statuses = setups.pop()
+        return diffing.naive_diff(previous, batch_keys, statuses)
+
+    setups = [setup() for _ in range(repeat + 1)]
+    result = measure()
+    return result, min(timeit.repeat(measure, number=1, repeat=repeat))
+
+
+def groups(names, statuses):
+    """Пачка для diff_groups: имена и статусы по пользователям."""
+    batch, start = [], 0
+    for tenant, tenant_names in names.items():
+        end = start + len(tenant_names)
+        batch.append((tenant, tenant_names, statuses[start:end]))
+        start = end
+    return batch
+
+
+def bench_table(names, before, after, repeat, use_numpy):
+    """Кодирование и сравнение пачки в StatusTable.
+
+    Таблица уже видела этих пользователей, как на любом шаге опроса,
+    кроме первого.
+    """
+    def setup():
+        table = diffing.StatusTable(
+            STATUSES, maxsize=len(after), use_numpy=use_numpy
+        )
+        for tenant, tenant_names, statuses in groups(names, before):
+            table.diff_groups([(tenant, tenant_names, table.encode(statuses))])
+        return table, groups(fresh(names), fresh(after))
+
+    def measure():
+        table, batch = setups.pop()
+        return table.diff_groups([
+            (tenant, tenant_names, table.encode(statuses))
+            for tenant, tenant_names, statuses in batch
+        ])
+
+    setups = [setup() for _ in range(repeat + 1)]
+    result = measure()
+    return result, min(timeit.repeat(measure, number=1, repeat=repeat))
+
+
+def main():
+    """Запускает замеры и печатает таблицу."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--changes', type=float, default=0.01,
+                        help='доля изменившихся статусов')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    variants = [('array', False)]
+    if diffing.load_numpy() is not None:
+        variants.append(('numpy', True))
+    print(f'{"работ":>8} {"цикл, мс":>10}' + ''.join(
+        f' {name + ", мс":>10}' for name, _ in variants
+    ))
+    for size in args.sizes:
+        names, keys, before, after = make_batch(
+            size, args.tenants, args.changes
+        )
+        expected, naive = bench_naive(names, keys, before, after, args.repeat)
+        row = f'{size:>8} {naive * 1000:>10.2f}'
+        for _, use_numpy in variants:
+            changed, elapsed = bench_table(
+                names, before, after, args.repeat, use_numpy
+            )
+            assert changed == expected
+            row += f' {elapsed * 1000:>10.2f}'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Холодный запуск и однократный проход в режиме --once.
+
+Замеряет импорт homework в новом процессе и проход по пользователям
+на заглушках API с задержкой сети при последовательных и параллельных
+запросах.
+
+    python bench_once.py --tenants 200 --latency 0.05
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import homework
+import senders
+import tenants
+import transport
+
+
+def import_time(repeat):
+    """Лучшее время запуска интерпретатора с импортом homework."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, '-c', 'import homework'], check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def once_time(tenant_count, latency, workers):
+    """Время одного прохода по tenant_count пользователям."""
+    # Лимит Telegram замеряется отдельно, здесь важна скорость опроса.
+    senders.BOT_RATE_LIMIT = 1e9
+    practicum = transport.FakePracticum(latency=latency)
+    bots = transport.FakeTelegram()
+    for number in range(tenant_count):
+        practicum.set_status(f'token{number}', 'hw1', 'reviewing')
+    registry = tenants.TenantRegistry(
+        [
+            tenants.Tenant(
+                f'tenant{number}', f'token{number}', number, '1:bench',
+                transport=practicum,
+            )
+            for number in range(tenant_count)
+        ],
+        homework.ENDPOINT,
+        bot_factory=bots,
+    )
+    homework.FETCH_WORKERS = workers
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        failed = homework.TenantWorker(registry).once(
+            os.path.join(directory, 'cursor.json')
+        )
+        elapsed = time.perf_counter() - start
+    assert not failed
+    return elapsed
+
+
+def main():
+    """Разбирает аргументы и печатает замеры."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='задержка ответа API, сек.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(f'Импорт homework: {import_time(args.repeat) * 1000:.0f} мс')
+    for workers in args.workers:
+        elapsed = once_time(args.tenants, args.latency, workers)
+        print(
+            f'Проход по {args.tenants} пользователям, потоков {workers}: '
+            f'{elapsed:.2f} с'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PATH = os.getenv('CURSOR_PATH', 'cursor.json')
+
+
+def load(path=CURSOR_PATH):
+    """Читает сохранённое состояние опроса; без файла возвращает {}."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        logger.error(f'Не удалось прочитать {path}: {error}')
+        return {}
+
+
+def save(path, data):
+    """Атомарно записывает состояние опроса."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(temporary, path)
@@ -0,0 +1,207 @@
+import array
+import itertools
+import os
+
+import memory
+
+# NumPy подгружается при первой большой пачке: на малых пачках он
+# не быстрее цикла, а его импорт заметно замедляет запуск.
+NUMPY_MIN_BATCH = int(os.getenv('NUMPY_MIN_BATCH', 1000))
+numpy = None
+
+# Код 0 у строки, статус которой ещё не известен, -1 у неизвестного
+# статуса; известные статусы кодируются с единицы.
+MISSING = 0
+UNKNOWN = -1
+
+
+def load_numpy():
+    """Импортирует NumPy при первом обращении; None, если его нет."""
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            module = False
+        numpy = module
+    return numpy or None
+
+
+class StatusTable:
+    """Последние статусы работ всех пользователей в одном массиве.
+
+    Статусы хранятся небольшими целыми числами, поэтому сравнение
+    пачки новых статусов с сохранёнными выполняется одной операцией
+    над массивом. Данные лежат в array; пачки от NUMPY_MIN_BATCH строк
+    сравниваются через NumPy без копирования, если он установлен.
+    Ключ строки — пара (пользователь, работа). Номера строк
+    пользователя запоминаются вместе со списком имён его работ: пока
+    список не меняется, ключи не хешируются заново. У каждого пользователя
+    не больше maxsize строк: лишние вытесняются среди его же давно не
+    встречавшихся, так что один пользователь не вытеснит остальных.
+    Строки текущей пачки не вытесняются никогда.
+    """
+
+    def __init__(self, statuses, maxsize=memory.STATUS_CACHE_SIZE,
+                 use_numpy=None):
+        self.codes = {
+            status: code for code, status in enumerate(statuses, 1)
+        }
+        self.maxsize = maxsize
+        self.use_numpy = use_numpy
+        self.index = {}
+        self._groups = {}
+        self._cached = {}
+        self._keys = []
+        self._free = []
+        self._tick = 0
+        self._rows = array.array('b')
+        self._seen = array.array('q')
+        memory.guard.register(self)
+
+    def __len__(self):
+        return len(self.index)
+
+    def items(self):
+        """Пары (ключ, статус) для всех известных строк."""
+        names = {code: status for status, code in self.codes.items()}
+        return [
+            (key, names.get(self._rows[row]))
+            for key, row in self.index.items()
+        ]
+
+    def encode(self, statuses):
+        """Переводит статусы в коды; неизвестные получают UNKNOWN."""
+        return list(map(self.codes.get, statuses, itertools.repeat(UNKNOWN)))
+
+    def _grow(self):
+        self._keys.append(None)
+        self._rows.append(MISSING)
+        self._seen.append(0)
+        return len(self._keys) - 1
+
+    def _oldest(self, rows, count, protect=None):
+        seen = self._seen
+        if protect is not None:
+            rows = [row for row in rows if seen[row] != protect]
+        return sorted(rows, key=seen.__getitem__)[:count]
+
+    def _evict(self, rows):
+        for row in rows:
+            key = self._keys[row]
+            del self.index[key]
+            self._cached.pop(key[0], None)
+            group = self._groups[key[0]]
+            group.discard(row)
+            if not group:
+                del self._groups[key[0]]
+            self._keys[row] = None
+            self._free.append(row)
+
+    def _allocate(self, key):
+        group = self._groups.setdefault(key[0], set())
+        if len(group) >= self.maxsize:
+            # Пачка больше maxsize может ненадолго превысить предел.
+            count = max(len(group) - self.maxsize + 1, self.maxsize // 10, 1)
+            self._evict(self._oldest(group, count, protect=self._tick))
+        row = self._free.pop() if self._free else self._grow()
+        self._keys[row] = key
+        self._rows[row] = MISSING
+        self._seen[row] = self._tick
+        self.index[key] = row
+        group.add(row)
+        return row
+
+    def shrink(self, fraction=0.5):
+        """Вытесняет долю строк, которые дольше всего не встречались."""
+        rows = list(self.index.values())
+        self._evict(self._oldest(rows, max(int(len(rows) * fraction), 1)))
+
+    def _lookup(self, keys):
+        get = self.index.get
+        rows = [get(key) for key in keys]
+        if None in rows:
+            # Уже найденные строки не должны вытесниться новыми.
+            for row in rows:
+                if row is not None:
+                    self._seen[row] = self._tick
+            for number, key in enumerate(keys):
+                if rows[number] is None:
+                    # Ключ мог встретиться в пачке раньше.
+                    row = get(key)
+                    rows[number] = self._allocate(key) if row is None else row
+        return rows
+
+    def _tenant_rows(self, tenant, names):
+        cached = self._cached.get(tenant)
+        if cached is not None and cached[0] == names:
+            return cached[1]
+        rows = array.array(
+            'q', self._lookup([(tenant, name) for name in names])
+        )
+        self._cached[tenant] = (names, rows)
+        return rows
+
+    def _numpy(self, size):
+        if self.use_numpy is None:
+            return size >= NUMPY_MIN_BATCH and load_numpy() is not None
+        return self.use_numpy and load_numpy() is not None
+
+    def _diff_numpy(self, rows, codes):
+        rows = numpy.frombuffer(rows, numpy.int64)
+        codes = numpy.frombuffer(codes, numpy.int8)
+        # Представления поверх array без копирования; пока они живы,
+        # array нельзя удлинять, поэтому они не покидают метод.
+        stored = numpy.frombuffer(self._rows, numpy.int8)
+        seen = numpy.frombuffer(self._seen, numpy.int64)
+        seen[rows] = self._tick
+        changed = numpy.flatnonzero(stored[rows] != codes)
+        stored[rows[changed]] = codes[changed]
+        del stored, seen
+        return changed.tolist()
+
+    def _compare(self, rows, codes):
+        if rows and self._numpy(len(rows)):
+            return self._diff_numpy(rows, codes)
+        stored, seen, tick = self._rows, self._seen, self._tick
+        changed = []
+        for number, (row, code) in enumerate(zip(rows, codes)):
+            seen[row] = tick
+            if stored[row] != code:
+                stored[row] = code
+                changed.append(number)
+        return changed
+
+    def diff(self, keys, codes):
+        """Сохраняет новые коды и возвращает номера изменившихся строк.
+
+        keys и codes идут параллельно; номера возвращаются по порядку.
+        """
+        self._tick += 1
+        return self._compare(
+            array.array('q', self._lookup(keys)), array.array('b', codes)
+        )
+
+    def diff_groups(self, groups):
+        """То же, что diff, для пачки из (пользователь, имена, коды).
+
+        Номера сквозные по всем группам. Список имён запоминается и не
+        должен меняться после вызова.
+        """
+        self._tick += 1
+        rows = array.array('q')
+        codes = array.array('b')
+        for tenant, names, tenant_codes in groups:
+            rows.extend(self._tenant_rows(tenant, names))
+            codes.extend(tenant_codes)
+        return self._compare(rows, codes)
+
+
+def naive_diff(previous, keys, statuses):
+    """Сравнение по одной записи в словаре; для бенчмарка."""
+    changed = []
+    for number, (key, status) in enumerate(zip(keys, statuses)):
+        if previous.get(key) != status:
+            previous[key] = status
+            changed.append(number)
+    return changed
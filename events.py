@@ -0,0 +1,304 @@
+import collections
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import requests
+import telegram
+
+logger = logging.getLogger(__name__)
+
+# Приёмники через запятую: stdout, jsonl:<путь>, webhook:<url>,
+# telegram:<chat_id>.
+EVENT_SINKS = os.getenv('EVENT_SINKS', '')
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 1000))
+EVENT_BATCH = int(os.getenv('EVENT_BATCH', 50))
+EVENT_LINGER = float(os.getenv('EVENT_LINGER', 1))
+WEBHOOK_TIMEOUT = 5
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class Event:
+    """Событие обработчика опроса."""
+
+    kind = 'event'
+    fields = ()
+
+    def __init__(self, tenant, **values):
+        self.tenant = tenant
+        self.time = time.time()
+        for field in self.fields:
+            setattr(self, field, values.get(field))
+
+    def to_dict(self):
+        """Представление для JSON-приёмников."""
+        data = {'kind': self.kind, 'tenant': self.tenant, 'time': self.time}
+        data.update((field, getattr(self, field)) for field in self.fields)
+        return data
+
+    def text(self):
+        """Короткое описание для людей."""
+        return f'{self.tenant}: {self.kind}'
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.tenant!r})'
+
+
+class StatusChanged(Event):
+    """У работы пользователя сменился статус."""
+
+    kind = 'status_changed'
+    fields = ('homework_name', 'status', 'message')
+
+    def text(self):
+        return f'{self.tenant}: {self.homework_name} → {self.status}'
+
+
+class PollFailed(Event):
+    """Опрос API для пользователя не удался."""
+
+    kind = 'poll_failed'
+    fields = ('error', 'failures')
+
+    def text(self):
+        return (
+            f'{self.tenant}: сбой опроса ({self.failures} подряд): '
+            f'{self.error}'
+        )
+
+
+class EndpointRecovered(Event):
+    """Опрос снова успешен после серии сбоев."""
+
+    kind = 'endpoint_recovered'
+    fields = ('failures', 'downtime')
+
+    def text(self):
+        return (
+            f'{self.tenant}: API снова отвечает после {self.failures} '
+            f'сбоев'
+        )
+
+
+class Sink:
+    """Приёмник событий; kinds ограничивает принимаемые типы."""
+
+    name = 'sink'
+    kinds = None
+
+    def accepts(self, event):
+        """Нужно ли передавать событие в этот приёмник."""
+        return self.kinds is None or isinstance(event, self.kinds)
+
+    def write(self, events):
+        """Записывает пачку событий; ошибки выбрасывает."""
+        raise NotImplementedError
+
+    def close(self):
+        """Освобождает ресурсы приёмника."""
+
+
+class StdoutSink(Sink):
+    """Пишет события в stdout по строке JSON на событие."""
+
+    name = 'stdout'
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, events):
+        self.stream.write(''.join(
+            json.dumps(event.to_dict(), ensure_ascii=False) + '\n'
+            for event in events
+        ))
+        self.stream.flush()
+
+
+class JsonlSink(StdoutSink):
+    """Дописывает события в файл JSON Lines."""
+
+    name = 'jsonl'
+
+    def __init__(self, path):
+        super().__init__(open(path, 'a', encoding='utf-8'))
+
+    def close(self):
+        self.stream.close()
+
+
+class WebhookSink(Sink):
+    """Отправляет пачки событий POST-запросом с JSON-массивом."""
+
+    name = 'webhook'
+
+    def __init__(self, url, session=None):
+        self.url = url
+        self.session = session or requests.Session()
+
+    def write(self, events):
+        response = self.session.post(
+            self.url, json=[event.to_dict() for event in events],
+            timeout=WEBHOOK_TIMEOUT,
+        )
+        response.raise_for_status()
+
+
+class TelegramSink(Sink):
+    """Присылает сводку о сбоях и восстановлении в служебный чат."""
+
+    name = 'telegram'
+    kinds = (PollFailed, EndpointRecovered)
+
+    def __init__(self, bot, chat_id):
+        self.bot = bot
+        self.chat_id = chat_id
+
+    def write(self, events):
+        text = '\n'.join(event.text() for event in events)
+        self.bot.send_message(
+            chat_id=self.chat_id, text=text[:TELEGRAM_MESSAGE_LIMIT]
+        )
+
+
+class Channel:
+    """Очередь и поток одного приёмника.
+
+    Очередь ограничена: при переполнении вытесняются самые старые
+    события, поэтому медленный приёмник не тормозит ни опрос, ни
+    другие приёмники. События передаются пачками до batch штук или
+    по истечении linger секунд.
+    """
+
+    def __init__(self, sink, maxsize=EVENT_QUEUE_SIZE, batch=EVENT_BATCH,
+                 linger=EVENT_LINGER):
+        self.sink = sink
+        self.batch = batch
+        self.linger = linger
+        self.published = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._queue = collections.deque(maxlen=maxsize)
+        self._ready = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self.run, name=f'sink-{sink.name}', daemon=True
+        )
+
+    def start(self):
+        """Запускает поток приёмника."""
+        self._thread.start()
+
+    def put(self, event):
+        """Ставит событие в очередь, не блокируясь."""
+        with self._ready:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(event)
+            self.published += 1
+            if len(self._queue) >= self.batch:
+                self._ready.notify()
+
+    def _take(self):
+        with self._ready:
+            if len(self._queue) < self.batch and not self._closed:
+                self._ready.wait(self.linger)
+            return [
+                self._queue.popleft()
+                for _ in range(min(self.batch, len(self._queue)))
+            ]
+
+    def run(self):
+        """Цикл потока: забирает пачки и передаёт их приёмнику."""
+        while True:
+            events = self._take()
+            if not events:
+                if self._closed:
+                    return
+                continue
+            try:
+                self.sink.write(events)
+                self.written += len(events)
+            except Exception as error:
+                self.failed += len(events)
+                logger.error(f'Приёмник {self.sink.name} не принял '
+                             f'{len(events)} событий: {error}')
+
+    def close(self, timeout=None):
+        """Дописывает очередь и останавливает поток."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._thread.join(timeout)
+        self.sink.close()
+
+    def stats(self):
+        """Счётчики очереди приёмника."""
+        return {
+            'queued': len(self._queue),
+            'published': self.published,
+            'dropped': self.dropped,
+            'written': self.written,
+            'failed': self.failed,
+        }
+
+
+class EventBus:
+    """Раздаёт события всем подписанным приёмникам."""
+
+    def __init__(self):
+        self.channels = []
+
+    @property
+    def active(self):
+        """Есть ли хоть один приёмник."""
+        return bool(self.channels)
+
+    def subscribe(self, sink, **options):
+        """Подключает приёмник со своей очередью и потоком."""
+        channel = Channel(sink, **options)
+        channel.start()
+        self.channels.append(channel)
+        return channel
+
+    def publish(self, event):
+        """Передаёт событие приёмникам, которые его принимают."""
+        for channel in self.channels:
+            if channel.sink.accepts(event):
+                channel.put(event)
+
+    def close(self, timeout=5):
+        """Дописывает очереди всех приёмников и останавливает их."""
+        for channel in self.channels:
+            channel.close(timeout)
+        self.channels = []
+
+    def stats(self):
+        """Счётчики по приёмникам."""
+        return {
+            channel.sink.name: channel.stats() for channel in self.channels
+        }
+
+
+def make_sink(spec, telegram_token=None, bot_factory=telegram.Bot):
+    """Создаёт приёмник по строке вида 'jsonl:events.jsonl'."""
+    kind, _, argument = spec.strip().partition(':')
+    if kind == 'stdout':
+        return StdoutSink()
+    if kind == 'jsonl':
+        return JsonlSink(argument or 'events.jsonl')
+    if kind == 'webhook':
+        return WebhookSink(argument)
+    if kind == 'telegram':
+        return TelegramSink(bot_factory(token=telegram_token), argument)
+    raise ValueError(f'Неизвестный приёмник событий: {spec!r}.')
+
+
+def subscribe_configured(bus, spec=EVENT_SINKS, **options):
+    """Подключает к шине приёмники из EVENT_SINKS."""
+    for item in filter(str.strip, spec.split(',')):
+        bus.subscribe(make_sink(item, **options))
+    return bus
@@ -23,6 +23,22 @@ class StatusError(Exception):
 class EndpointStatusError(Exception):
     """Возникла проблема с удаленным сервером."""
 
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class EndpointNotAnswer(Exception):
     """Удаленный сервер не отвечает"""
+
+
+class NoSenderAvailable(Exception):
+    """Все боты пула временно отключены; отправку нужно повторить."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MessageMaybeSent(Exception):
+    """Ответ Telegram не получен: сообщение могло быть доставлено."""
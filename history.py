@@ -0,0 +1,227 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = os.getenv('HISTORY_PATH')
+HISTORY_BATCH = int(os.getenv('HISTORY_BATCH', 500))
+HISTORY_FLUSH_INTERVAL = int(os.getenv('HISTORY_FLUSH_INTERVAL', 30))
+LATENCY_BUCKET = 60
+FINAL_STATUSES = ('approved', 'rejected')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS transitions (
+    id INTEGER PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    homework_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    reviewer_comment TEXT,
+    date_updated REAL NOT NULL,
+    observed_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS transitions_unique
+    ON transitions (tenant, homework_name, status, date_updated);
+CREATE INDEX IF NOT EXISTS transitions_tenant_time
+    ON transitions (tenant, date_updated);
+CREATE TABLE IF NOT EXISTS open_reviews (
+    tenant TEXT NOT NULL,
+    homework_name TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    PRIMARY KEY (tenant, homework_name)
+);
+CREATE TABLE IF NOT EXISTS review_latency (
+    tenant TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (tenant, bucket)
+);
+CREATE TABLE IF NOT EXISTS project_verdicts (
+    tenant TEXT NOT NULL,
+    homework_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (tenant, homework_name, status)
+);
+'''
+
+
+def parse_date(value, default):
+    """Переводит дату из ответа API (ISO 8601) в timestamp."""
+    if not value:
+        return default
+    try:
+        return datetime.datetime.fromisoformat(
+            value.replace('Z', '+00:00')
+        ).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class HistoryStore:
+    """История смен статусов с агрегатами для команды /stats.
+
+    Переходы копятся в памяти и записываются пачкой. Вместе с пачкой
+    в той же транзакции обновляются агрегаты: гистограмма времени
+    от reviewing до вердикта (корзины по минуте) и число вердиктов по
+    проектам. Поэтому /stats не сканирует таблицу переходов.
+    """
+
+    def __init__(self, path, batch=HISTORY_BATCH,
+                 flush_interval=HISTORY_FLUSH_INTERVAL):
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+
+    def observe(self, tenant, homework):
+        """Добавляет наблюдённый статус работы в очередь на запись."""
+        now = time.time()
+        with self._lock:
+            self._buffer.append((
+                str(tenant),
+                homework.get('homework_name'),
+                homework.get('status'),
+                homework.get('reviewer_comment'),
+                parse_date(homework.get('date_updated'), now),
+                now,
+            ))
+            due = (
+                len(self._buffer) >= self.batch
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленные переходы и обновляет агрегаты."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._flushed_at = time.monotonic()
+            if not rows:
+                return 0
+            inserted = 0
+            with self._db:
+                for row in rows:
+                    cursor = self._db.execute(
+                        'INSERT OR IGNORE INTO transitions (tenant, '
+                        'homework_name, status, reviewer_comment, '
+                        'date_updated, observed_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        row,
+                    )
+                    if cursor.rowcount:
+                        inserted += 1
+                        self._update_rollups(row[0], row[1], row[2], row[4])
+            return inserted
+
+    def _update_rollups(self, tenant, homework_name, status, updated_at):
+        if status == 'reviewing':
+            self._db.execute(
+                'INSERT OR REPLACE INTO open_reviews VALUES (?, ?, ?)',
+                (tenant, homework_name, updated_at),
+            )
+            return
+        if status not in FINAL_STATUSES:
+            return
+        self._db.execute(
+            'INSERT INTO project_verdicts VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (tenant, homework_name, status) '
+            'DO UPDATE SET count = count + 1',
+            (tenant, homework_name, status),
+        )
+        started = self._db.execute(
+            'SELECT started_at FROM open_reviews '
+            'WHERE tenant = ? AND homework_name = ?',
+            (tenant, homework_name),
+        ).fetchone()
+        if started is None:
+            return
+        self._db.execute(
+            'DELETE FROM open_reviews WHERE tenant = ? AND homework_name = ?',
+            (tenant, homework_name),
+        )
+        bucket = int(max(0, updated_at - started[0]) // LATENCY_BUCKET)
+        self._db.execute(
+            'INSERT INTO review_latency VALUES (?, ?, 1) '
+            'ON CONFLICT (tenant, bucket) '
+            'DO UPDATE SET count = count + 1',
+            (tenant, bucket),
+        )
+
+    def median_review_time(self, tenant):
+        """Медиана времени проверки в секундах (с точностью до минуты)."""
+        with self._lock:
+            buckets = self._db.execute(
+                'SELECT bucket, count FROM review_latency '
+                'WHERE tenant = ? ORDER BY bucket',
+                (str(tenant),),
+            ).fetchall()
+        total = sum(count for _, count in buckets)
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen * 2 >= total:
+                return (bucket + 0.5) * LATENCY_BUCKET
+        return None
+
+    def verdicts(self, tenant):
+        """Число одобрений и возвратов по каждому проекту."""
+        result = {}
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT homework_name, status, count FROM project_verdicts '
+                'WHERE tenant = ?',
+                (str(tenant),),
+            ).fetchall()
+        for homework_name, status, count in rows:
+            result.setdefault(homework_name, dict.fromkeys(FINAL_STATUSES, 0))
+            result[homework_name][status] = count
+        return result
+
+    def stats(self, tenant):
+        """Текст ответа на команду /stats."""
+        self.flush()
+        median = self.median_review_time(tenant)
+        if median is None:
+            lines = ['Медиана времени проверки: нет данных']
+        else:
+            lines = [f'Медиана времени проверки: {median / 3600:.1f} ч.']
+        for homework_name, counts in sorted(self.verdicts(tenant).items()):
+            lines.append(
+                f'{homework_name}: возвратов {counts["rejected"]}, '
+                f'принято {counts["approved"]}'
+            )
+        return '\n'.join(lines)
+
+    def close(self):
+        """Сбрасывает буфер и закрывает базу."""
+        self.flush()
+        self._db.close()
+
+
+def start_stats_command(token, store, tenant_by_chat):
+    """Запускает обработку команды /stats через long polling."""
+    # telegram.ext тянет tornado и apscheduler; импорт только по запросу
+    # ускоряет запуск, когда команда не нужна.
+    from telegram.ext import CommandHandler, Updater
+
+    def handle(update, context):
+        chat_id = str(update.effective_chat.id)
+        tenant = tenant_by_chat.get(chat_id)
+        if tenant is None:
+            return
+        update.message.reply_text(store.stats(tenant))
+
+    updater = Updater(token=token)
+    updater.dispatcher.add_handler(CommandHandler('stats', handle))
+    updater.start_polling()
+    return updater
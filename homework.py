@@ -1,12 +1,33 @@
+import argparse
+import bisect
+import collections
 import logging
 import os
-import requests
+import queue
 import sys
+import threading
 import telegram
 import time
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 from dotenv import load_dotenv
+import admin
+import cursor
+import diffing
+import events
 import exceptions
+import history
+import memory
+import outbox
+import policy
+import profiling
+import ratelimit
+import scheduler
+import senders
+import streaming
+import tenants
+import transport
+import warmup
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -18,6 +39,10 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+FETCH_WORKERS = int(os.getenv('FETCH_WORKERS', 8))
+# Сколько отложенных уведомлений пользователя держать в памяти, если
+# журнал уведомлений не включён.
+DEFERRED_LIMIT = int(os.getenv('DEFERRED_LIMIT', 100))
 
 
 HOMEWORK_VERDICTS = {
@@ -27,31 +52,93 @@ HOMEWORK_VERDICTS = {
 }
 
 
+def send_to_chat(bot, chat_id, message):
+    """Отправляет сообщение в чат Telegram и возвращает его message_id."""
+    sent = bot.send_message(chat_id=chat_id, text=message)
+    logger.debug(f'Сообщение успешно отправлено в Telegram. {message}')
+    return getattr(sent, 'message_id', None)
+
+
+@profiling.timed()
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
     try:
-        logger.debug(f'Сообщение успешно отправлено в Telegram. {message}')
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        policy.call(send_to_chat, bot, TELEGRAM_CHAT_ID, message)
     except Exception as error:
         logger.error(f'Ошибка при отправке сообщения. {error}')
 
 
-def get_api_answer(timestamp):
-    """Делает запрос к эндпоинту API-сервиса."""
+def open_statuses(headers, timestamp, stream=False, client=None,
+                  endpoint=None):
+    """Отправляет запрос статусов работ и проверяет код ответа."""
+    client = client or transport.default_transport
+    endpoint = endpoint or ENDPOINT
     params = {'from_date': timestamp}
+    if ratelimit.limiter:
+        ratelimit.limiter.acquire()
     try:
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        response = client.get(
+            endpoint, headers=headers, params=params, stream=stream
+        )
     except Exception as error:
         raise exceptions.EndpointNotAnswer(error)
     if response.status_code != HTTPStatus.OK:
         message = (
-            f'Ресурс {ENDPOINT} недоступен. '
+            f'Ресурс {endpoint} недоступен. '
             f'Код ответа: {response.status_code}.'
         )
-        raise exceptions.EndpointStatusError(message)
-    return response.json()
+        if (
+            response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+            and ratelimit.limiter
+        ):
+            ratelimit.limiter.drain()
+        raise exceptions.EndpointStatusError(message, response.status_code)
+    return response
+
+
+def request_statuses(headers, timestamp, **kwargs):
+    """Запрашивает статусы работ с заданными заголовками авторизации."""
+    return open_statuses(headers, timestamp, **kwargs).json()
+
+
+def stream_statuses(headers, timestamp, **kwargs):
+    """Запрашивает статусы работ и разбирает ответ по мере получения."""
+    response = open_statuses(headers, timestamp, stream=True, **kwargs)
+
+    def chunks():
+        with response:
+            yield from response.iter_content(streaming.STREAM_CHUNK)
+
+    return streaming.HomeworkStream(chunks())
+
+
+@profiling.timed()
+def fetch_homeworks(tenant, timestamp, client=None):
+    """Возвращает список работ из ответа API и остальные поля ответа.
 
+    В потоковом режиме работы выдаются по одной по мере чтения ответа,
+    а поля заполняются к концу итерации. client используется, если у
+    пользователя нет своего транспорта.
+    """
+    options = {
+        'client': tenant.transport or client,
+        'endpoint': tenant.endpoint,
+    }
+    if streaming.STREAM_RESPONSES:
+        stream = stream_statuses(tenant.headers, timestamp, **options)
+        return stream, stream.fields
+    response = request_statuses(tenant.headers, timestamp, **options)
+    check_response(response)
+    return response['homeworks'], response
 
+
+@profiling.timed()
+def get_api_answer(timestamp):
+    """Делает запрос к эндпоинту API-сервиса."""
+    return request_statuses(HEADERS, timestamp)
+
+
+@profiling.timed()
 def check_response(response):
     """Проверяет ответ API на корректность."""
     if not isinstance(response, dict):
@@ -66,6 +153,7 @@ def check_response(response):
     return response['homeworks'][0]
 
 
+@profiling.timed()
 def parse_status(homework):
     """Извлекает статус домашней работы."""
     if 'homework_name' not in homework:
@@ -86,6 +174,8 @@ def parse_status(homework):
 
 def check_tokens():
     """Проверяет доступность переменных окружения."""
+    if tenants.TENANTS_FILE:
+        return bool(TELEGRAM_TOKEN)
     return all([
         PRACTICUM_TOKEN,
         TELEGRAM_TOKEN,
@@ -93,29 +183,667 @@ def check_tokens():
     ])
 
 
+def encode_homeworks(homeworks, table):
+    """Имена работ и коды их статусов; неизвестный статус — ошибка."""
+    try:
+        names = [homework['homework_name'] for homework in homeworks]
+        statuses = [homework['status'] for homework in homeworks]
+    except KeyError as error:
+        raise KeyError(f'Ключ {error} отсутствует.')
+    codes = table.encode(statuses)
+    if diffing.UNKNOWN in codes:
+        logger.error('Не определен статус домашней работы!')
+        raise exceptions.StatusError()
+    return names, codes
+
+
+def fail_tenant(tenant, state, registry, error):
+    """Запоминает сбой опроса и при необходимости ставит карантин."""
+    state['error'] = str(error)
+    state['failed_at'] = int(time.time())
+    rule = policy.classify(error)
+    if rule.quarantine:
+        registry.quarantine(tenant.name, str(error))
+    log = logger.error if rule.alert else logger.warning
+    log(f'Сбой опроса {tenant.name}: {error}')
+
+
+def fetch_tenant(tenant, state, registry, table, client=None):
+    """Запрашивает работы пользователя и кодирует их статусы.
+
+    Возвращает работы, их имена, коды статусов и остальные поля ответа
+    или None при сбое. Потоковый ответ возвращается неразобранным,
+    с None вместо имён и кодов: его разбирает цикл опроса.
+    """
+    try:
+        homeworks, fields = policy.call(
+            fetch_homeworks, tenant, state['timestamp'], client=client,
+            sleep=time.sleep,
+        )
+        if isinstance(homeworks, streaming.HomeworkStream):
+            return homeworks, None, None, fields
+        names, codes = encode_homeworks(homeworks, table)
+        return homeworks, names, codes, fields
+    except Exception as error:
+        fail_tenant(tenant, state, registry, error)
+    return None
+
+
+def log_stages():
+    """Пишет в лог сводку по длительности этапов, если она включена."""
+    if profiling.recorder.enabled:
+        logger.debug(f'Этапы: {profiling.recorder.summary()}')
+
+
+def start_outbox(send):
+    """Открывает журнал уведомлений и запускает поток отправки."""
+    if not outbox.OUTBOX_PATH:
+        return None
+    box = outbox.Outbox(outbox.OUTBOX_PATH)
+    box.start(send)
+    return box
+
+
+def open_history(tenant_by_chat):
+    """Открывает историю статусов и включает команду /stats."""
+    if not history.HISTORY_PATH:
+        return None
+    store = history.HistoryStore(history.HISTORY_PATH)
+    history.start_stats_command(TELEGRAM_TOKEN, store, tenant_by_chat)
+    return store
+
+
+class TenantWorker:
+    """Опрос множества пользователей в порядке очереди планировщика."""
+
+    def __init__(self, registry, clock=time.monotonic):
+        """Готовит очередь опросов и состояние пользователей."""
+        self.registry = registry
+        self.clock = clock
+        self.plan = scheduler.Scheduler(
+            RETRY_PERIOD,
+            budget=scheduler.POLL_BUDGET or len(registry.tenants),
+        )
+        self.states = {}
+        self.pool = senders.SenderPool(
+            senders.TELEGRAM_TOKENS or [TELEGRAM_TOKEN],
+            factory=registry.bot_factory,
+            private=[
+                tenant.telegram_token
+                for tenant in registry.tenants.values()
+            ],
+        )
+        self.table = diffing.StatusTable(
+            HOMEWORK_VERDICTS,
+            maxsize=memory.STATUS_CACHE_SIZE,
+        )
+        self.box = None
+        self.history = None
+        self.admin = None
+        self.executor = None
+        # Общая сессия держит соединения с API между опросами.
+        self.transport = transport.HttpTransport(
+            transport.make_session(FETCH_WORKERS), transport.API_TIMEOUT
+        )
+        self.warmer = None
+        self.bus = events.EventBus()
+        self.paused = set()
+        self.commands = queue.SimpleQueue()
+        self.wake = threading.Event()
+
+    @profiling.timed('send_message')
+    def send(self, name, chat_id, message):
+        """Отправляет сообщение через пул ботов."""
+        token = self.registry.tenants[name].telegram_token
+        message_id = self.pool.send(
+            chat_id, message,
+            preferred=token if token != TELEGRAM_TOKEN else None,
+        )
+        logger.debug(f'Сообщение успешно отправлено в Telegram. {message}')
+        return message_id
+
+    def notify(self, tenant, homework, message):
+        """Отправляет уведомление или откладывает его до конца тихих часов."""
+        key = outbox.make_key(tenant.name, homework)
+        release = tenant.subscription.quiet_until(time.time())
+        if release:
+            self.defer(tenant, key, message, release)
+            return
+        self.dispatch(tenant, key, message)
+
+    def defer(self, tenant, key, message, release):
+        """Откладывает уведомление до времени release.
+
+        С журналом уведомление сразу записывается на диск с временем
+        первой попытки и переживает перезапуск. Без журнала оно ждёт
+        в памяти, где у пользователя не больше DEFERRED_LIMIT записей.
+        """
+        if self.box:
+            self.box.add(
+                key, tenant.chat_id, message, tenant.name, not_before=release
+            )
+            return
+        deferred = self.states[tenant.name].setdefault('deferred', [])
+        if len(deferred) >= DEFERRED_LIMIT:
+            dropped = deferred.pop(0)
+            logger.warning(
+                f'Отложенных уведомлений {tenant.name} больше '
+                f'{DEFERRED_LIMIT}, пропущено: {dropped[2]}'
+            )
+        deferred.append([release, key, message])
+
+    def dispatch(self, tenant, key, message):
+        """Передаёт уведомление в журнал или сразу отправляет его.
+
+        Без журнала уведомление, которое не удалось отправить из-за
+        временной ошибки, откладывается и отправляется повторно.
+        """
+        if self.box:
+            self.box.add(key, tenant.chat_id, message, tenant.name)
+            return
+        try:
+            policy.call(self.send, tenant.name, tenant.chat_id, message)
+        except Exception as error:
+            logger.error(f'Ошибка при отправке сообщения. {error}')
+            if policy.classify(error).requeue:
+                delay = getattr(error, 'retry_after', None)
+                if delay is None:
+                    delay = senders.BOT_COOLDOWN
+                self.defer(tenant, key, message, time.time() + delay)
+
+    def start(self):
+        """Проверяет токены и ставит всех пользователей в очередь."""
+        self.registry.validate()
+        for tenant in self.registry.active():
+            self.plan.add(tenant.name, self.clock())
+        self.box = start_outbox(self.send)
+        self.history = open_history({
+            str(tenant.chat_id): tenant.name
+            for tenant in self.registry.tenants.values()
+        })
+        self.admin = admin.start(self)
+        self.subscribe_sinks()
+
+    def subscribe_sinks(self):
+        """Подключает к шине событий приёмники из EVENT_SINKS."""
+        events.subscribe_configured(
+            self.bus, telegram_token=TELEGRAM_TOKEN,
+            bot_factory=self.registry.bot_factory,
+        )
+
+    def command(self, name, action):
+        """Ставит команду админки в очередь цикла опроса.
+
+        Опрос пользователя в карантине не ставится: его токен отклонён.
+        """
+        if name not in self.registry.tenants:
+            return False
+        if action == 'poll' and name in self.registry.quarantined:
+            return False
+        self.commands.put((name, action))
+        self.wake.set()
+        return True
+
+    def run_commands(self, now):
+        """Выполняет команды админки, накопившиеся с прошлого шага."""
+        while True:
+            try:
+                name, action = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            logger.info(f'Команда админки: {action} {name}.')
+            if action == 'pause':
+                self.paused.add(name)
+            elif action == 'resume':
+                self.paused.discard(name)
+                self.plan.add(name, now)
+            elif action == 'poll':
+                # Карантин мог начаться после постановки команды.
+                if name in self.registry.quarantined:
+                    logger.warning(f'Опрос {name} отклонён: карантин.')
+                    continue
+                if name not in self.plan.stats:
+                    self.plan.add(name, now)
+                self.poll(name, now)
+
+    def describe_tenant(self, name):
+        """Состояние пользователя для админки."""
+        tenant = self.registry.tenants.get(name)
+        if tenant is None:
+            return None
+        state = self.states.get(name, {})
+        due = self.plan.due(name)
+        recheck_at = self.registry.quarantined.get(name)
+        stats = self.plan.stats.get(name)
+        return {
+            'name': name,
+            'chat_id': tenant.chat_id,
+            'paused': name in self.paused,
+            'next_poll_in': None if due is None else due - self.clock(),
+            'status': state.get('status'),
+            'message': state.get('message'),
+            'error': state.get('error'),
+            'failed_at': state.get('failed_at'),
+            'deferred': len(state.get('deferred', ())),
+            'errors_in_row': stats.errors if stats else 0,
+            'circuit': 'closed' if recheck_at is None else 'open',
+            'recheck_in': (
+                None if recheck_at is None
+                else recheck_at - time.monotonic()
+            ),
+        }
+
+    def describe(self):
+        """Сводка по всем пользователям, очереди уведомлений и ботам."""
+        return {
+            'tenants': [
+                self.describe_tenant(name)
+                for name in list(self.registry.tenants)
+            ],
+            'outbox_depth': self.box.depth() if self.box else 0,
+            'senders': self.pool.stats(),
+            'rate_limit': (
+                ratelimit.limiter.stats() if ratelimit.limiter else None
+            ),
+            'sinks': self.bus.stats(),
+            'connections': (
+                self.warmer.stats() if self.warmer
+                else warmup.connection_stats(self.transport.session)
+            ),
+        }
+
+    def throttle(self, name, planned, deferred, now):
+        """Откладывает опрос, если лимит запросов не покроет его сейчас.
+
+        Токен берёт сам запрос, здесь лишь учитываются planned опросов,
+        уже назначенных на этот шаг.
+        """
+        if not ratelimit.limiter:
+            return False
+        wait = ratelimit.limiter.delay(planned + 1)
+        if not wait:
+            return False
+        # Разносим отложенные опросы, чтобы не было всплеска.
+        wait += deferred / ratelimit.limiter.rate
+        ratelimit.limiter.record_wait(wait)
+        self.plan.postpone(name, wait, now)
+        return True
+
+    def poll(self, name, now):
+        """Опрашивает одного пользователя и планирует следующий опрос."""
+        self.poll_batch([name], now)
+
+    def fetch(self, name):
+        """Запрашивает работы одного пользователя."""
+        return fetch_tenant(
+            self.registry.tenants[name], self.states[name], self.registry,
+            self.table, client=self.transport,
+        )
+
+    def fetch_batch(self, names, now):
+        """Запрашивает работы пользователей параллельно.
+
+        Сбои сразу планирует, успешные ответы возвращает для сравнения.
+        """
+        for name in names:
+            self.states.setdefault(name, {'timestamp': int(time.time())})
+        if len(names) > 1 and FETCH_WORKERS > 1:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    FETCH_WORKERS, thread_name_prefix='fetch'
+                )
+            results = self.executor.map(self.fetch, names)
+        else:
+            results = map(self.fetch, names)
+        batch = []
+        for name, fetched in zip(names, results):
+            if fetched is None:
+                self.failed(name, now)
+            else:
+                batch.append((name, self.states[name], fetched))
+        return batch
+
+    def failed(self, name, now):
+        """Планирует повтор после сбоя опроса и сообщает о сбое."""
+        state = self.states[name]
+        self.plan.record(name, None, False, True, now)
+        state.setdefault('failing_since', state['failed_at'])
+        self.bus.publish(events.PollFailed(
+            name, error=state['error'],
+            failures=self.plan.stats[name].errors,
+        ))
+
+    def polled(self, name, latest, changed, fields, now):
+        """Сдвигает курсор пользователя и планирует следующий опрос."""
+        state = self.states[name]
+        state['timestamp'] = fields.get('current_date', state['timestamp'])
+        state['status'] = latest or state.get('status')
+        self.recovered(name, state)
+        self.plan.record(name, latest, changed, False, now)
+
+    def poll_batch(self, names, now):
+        """Опрашивает пользователей и сравнивает все статусы разом.
+
+        Уведомления формируются только для изменившихся работ.
+        Потоковые ответы сравниваются по одной записи в poll_stream.
+        Каждый поток открывается прямо перед чтением: открытые заранее
+        ответы держали бы соединения, и пул открывал бы новые.
+        """
+        if streaming.STREAM_RESPONSES:
+            for name in names:
+                for _, state, fetched in self.fetch_batch([name], now):
+                    stream, _, _, fields = fetched
+                    self.poll_stream(name, state, stream, fields, now)
+            return
+        batch = self.fetch_batch(names, now)
+        groups, starts, start = [], [], 0
+        for name, _, (_, homework_names, tenant_codes, _) in batch:
+            groups.append((name, homework_names, tenant_codes))
+            starts.append(start)
+            start += len(homework_names)
+        changed = collections.defaultdict(list)
+        for number in self.table.diff_groups(groups):
+            index = bisect.bisect_right(starts, number) - 1
+            name, _, (homeworks, _, _, _) = batch[index]
+            changed[name].append(homeworks[number - starts[index]])
+        for name, state, _ in batch:
+            self.handle_changes(name, state, changed[name])
+        if self.box:
+            # Уведомления попадают на диск раньше, чем сдвинутся курсоры.
+            self.box.flush()
+        for name, _, (homeworks, _, _, fields) in batch:
+            latest = homeworks[0]['status'] if homeworks else None
+            self.polled(name, latest, bool(changed[name]), fields, now)
+
+    def poll_stream(self, name, state, stream, fields, now):
+        """Разбирает потоковый ответ, сравнивая работы по одной.
+
+        В памяти держится одна запись, а уведомление уходит, не
+        дожидаясь конца ответа. Пакетное сравнение здесь не
+        применяется: ради него пришлось бы собрать весь ответ.
+        """
+        latest = None
+        changed = False
+        try:
+            for homework in stream:
+                names, codes = encode_homeworks([homework], self.table)
+                if latest is None:
+                    latest = homework['status']
+                if self.table.diff([(name, names[0])], codes):
+                    changed = True
+                    self.handle_changes(name, state, [homework])
+        except Exception as error:
+            fail_tenant(self.registry.tenants[name], state, self.registry,
+                        error)
+            self.failed(name, now)
+            return
+        if self.box:
+            self.box.flush()
+        self.polled(name, latest, changed, fields, now)
+
+    def recovered(self, name, state):
+        """Сообщает о восстановлении опроса после серии сбоев."""
+        since = state.pop('failing_since', None)
+        stats = self.plan.stats.get(name)
+        if since is None or stats is None or not stats.errors:
+            return
+        self.bus.publish(events.EndpointRecovered(
+            name, failures=stats.errors, downtime=time.time() - since,
+        ))
+
+    def handle_changes(self, name, state, homeworks):
+        """Пропускает изменения через подписку и уведомляет о нужных.
+
+        Сообщение формируется только для работ, прошедших фильтр.
+        """
+        tenant = self.registry.tenants[name]
+        wants = tenant.subscription.wants
+        for homework in homeworks:
+            if self.history:
+                self.history.observe(name, homework)
+            message = None
+            if wants(homework):
+                message = parse_status(homework)
+                self.notify(tenant, homework, message)
+                state['message'] = message
+            if self.bus.active:
+                self.bus.publish(events.StatusChanged(
+                    name, homework_name=homework['homework_name'],
+                    status=homework['status'], message=message,
+                ))
+
+    def release_deferred(self, now=None):
+        """Отправляет отложенные уведомления, чьи тихие часы закончились."""
+        now = time.time() if now is None else now
+        for name, state in list(self.states.items()):
+            deferred = state.get('deferred')
+            if not deferred:
+                continue
+            state['deferred'] = [entry for entry in deferred if entry[0] > now]
+            tenant = self.registry.tenants[name]
+            for release, key, message in deferred:
+                if release <= now:
+                    self.dispatch(tenant, key, message)
+
+    def snapshot(self):
+        """Курсоры и последние статусы работ для сохранения на диск."""
+        data = {
+            name: {
+                'timestamp': state['timestamp'],
+                'statuses': {},
+                'deferred': state.get('deferred', []),
+            }
+            for name, state in self.states.items()
+        }
+        for (name, homework_name), status in self.table.items():
+            if name in data and status is not None:
+                data[name]['statuses'][homework_name] = status
+        # Карантин хранится по настенным часам: monotonic не переживает
+        # перезапуск процесса.
+        offset = time.time() - time.monotonic()
+        for name, recheck_at in self.registry.quarantined.items():
+            data.setdefault(name, {
+                'timestamp': int(time.time()), 'statuses': {},
+                'deferred': [],
+            })['quarantined_until'] = recheck_at + offset
+        return data
+
+    def restore(self, data):
+        """Восстанавливает курсоры и статусы, сохранённые snapshot."""
+        keys, statuses = [], []
+        offset = time.time() - time.monotonic()
+        for name, saved in data.items():
+            if name not in self.registry.tenants:
+                continue
+            until = saved.get('quarantined_until')
+            if until is not None and until > time.time():
+                self.registry.quarantined[name] = until - offset
+            self.states[name] = {
+                'timestamp': saved['timestamp'],
+                'deferred': saved.get('deferred', []),
+            }
+            for homework_name, status in saved['statuses'].items():
+                keys.append((name, homework_name))
+                statuses.append(status)
+        self.table.diff(keys, self.table.encode(statuses))
+
+    def once(self, path=cursor.CURSOR_PATH):
+        """Один проход по всем пользователям с сохранением курсоров.
+
+        Пользователи в карантине, сохранённом в курсоре, пропускаются
+        до срока повторной проверки. Возвращает число пользователей,
+        опрос которых не удался.
+        """
+        now = self.clock()
+        self.restore(cursor.load(path))
+        self.subscribe_sinks()
+        names = [tenant.name for tenant in self.registry.active()]
+        for name in names:
+            self.plan.add(name, now)
+        if outbox.OUTBOX_PATH:
+            self.box = outbox.Outbox(outbox.OUTBOX_PATH)
+        if history.HISTORY_PATH:
+            self.history = history.HistoryStore(history.HISTORY_PATH)
+        self.poll_batch(names, now)
+        self.release_deferred()
+        if self.box:
+            while self.box.deliver(self.send) >= outbox.OUTBOX_BATCH:
+                pass
+            self.box.purge()
+            self.box.close()
+        if self.history:
+            self.history.close()
+        if self.executor:
+            self.executor.shutdown()
+        self.bus.close()
+        cursor.save(path, self.snapshot())
+        return sum(1 for name in names if self.plan.stats[name].errors)
+
+    def tick(self):
+        """Опрашивает всех пользователей, чья очередь подошла."""
+        now = self.clock()
+        self.run_commands(now)
+        self.release_deferred()
+        for name in self.registry.recheck_quarantined():
+            if name not in self.registry.quarantined:
+                self.plan.add(name, now)
+        deferred = 0
+        names = []
+        for name in self.plan.pop_due(now):
+            if name in self.registry.quarantined:
+                self.plan.remove(name)
+            elif name in self.paused:
+                continue
+            elif self.throttle(name, len(names), deferred, now):
+                deferred += 1
+            else:
+                names.append(name)
+        self.poll_batch(names, now)
+
+    def start_warmer(self):
+        """Включает кэш DNS и прогрев соединений перед опросами.
+
+        Адрес API прогревается с авторизацией первого активного
+        пользователя, который к нему обращается.
+        """
+        dns = None
+        if warmup.DNS_CACHE_TTL:
+            dns = warmup.DnsCache()
+            dns.install()
+        targets = {}
+        for tenant in self.registry.active():
+            if tenant.transport is None:
+                targets.setdefault(tenant.endpoint or ENDPOINT, tenant.headers)
+        self.warmer = warmup.Warmer(self.transport.session, targets, dns)
+
+    def sleep(self, delay):
+        """Ждёт следующего опроса, прогревая соединения незадолго до него.
+
+        Команда админки будит цикл раньше срока.
+        """
+        lead = warmup.WARMUP_LEAD
+        if self.warmer and lead and delay > lead:
+            if self.wake.wait(delay - lead):
+                self.wake.clear()
+                return
+            self.warmer.warm()
+            delay = lead
+        self.wake.wait(delay)
+        self.wake.clear()
+
+    def run(self):
+        """Бесконечный цикл опроса."""
+        self.start()
+        if warmup.WARMUP_LEAD or warmup.DNS_CACHE_TTL:
+            self.start_warmer()
+        while True:
+            try:
+                self.tick()
+            except Exception as error:
+                logger.error(f'Сбой шага опроса: {error}', exc_info=True)
+            log_stages()
+            memory.guard.check()
+            self.sleep(min(self.plan.next_delay(self.clock()), RETRY_PERIOD))
+
+
+def report_error(bot, error, last_alert):
+    """Оповещает о сбое по политике и возвращает паузу до повтора."""
+    rule = policy.classify(error)
+    message = f'Сбой в работе программы: {error}'
+    logger.error(message)
+    if rule.alert and message != last_alert:
+        send_message(bot, message)
+    delay = tenants.QUARANTINE_PERIOD if rule.quarantine else RETRY_PERIOD
+    return message, delay
+
+
+def load_registry():
+    """Пользователи из TENANTS_FILE или из переменных окружения."""
+    return tenants.TenantRegistry(
+        tenants.load_tenants(
+            PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_TOKEN
+        ),
+        ENDPOINT,
+    )
+
+
+def run_once():
+    """Однократный опрос для запуска по расписанию (cron)."""
+    if not check_tokens():
+        logger.critical('Отсутсвуют необходимые переменные')
+        sys.exit()
+    return TenantWorker(load_registry()).once()
+
+
+def deliver_update(bot, box, store, homework):
+    """Записывает и отправляет новый статус единственного пользователя."""
+    message = parse_status(homework)
+    if store:
+        store.observe('default', homework)
+    if box:
+        box.add(
+            outbox.make_key('default', homework), TELEGRAM_CHAT_ID, message,
+        )
+        box.flush()
+    elif message:
+        send_message(bot, message)
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
         logger.critical('Отсутсвуют необходимые переменные')
         sys.exit()
+    if tenants.TENANTS_FILE:
+        return TenantWorker(load_registry()).run()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    box = start_outbox(
+        lambda tenant, chat_id, text: send_to_chat(bot, chat_id, text)
+    )
+    store = open_history({str(TELEGRAM_CHAT_ID): 'default'})
     timestamp = int(time.time())
+    last_alert = None
+    last_status = None
     while True:
+        delay = RETRY_PERIOD
         try:
-            response = get_api_answer(timestamp)
+            response = policy.call(get_api_answer, timestamp)
             homework = check_response(response)
-            if homework:
-                message = parse_status(homework)
-                if message:
-                    send_message(bot, message)
+            # Тот же статус той же работы повторно не отправляется.
+            status = homework and (
+                homework.get('homework_name'), homework.get('status')
+            )
+            if status and status != last_status:
+                deliver_update(bot, box, store, homework)
+                last_status = status
+            timestamp = response.get('current_date') or timestamp
+            log_stages()
+            memory.guard.check()
+            last_alert = None
             logger.info('Повторение запроса через 10 мин.')
-            time.sleep(RETRY_PERIOD)
         except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            send_message(bot, message)
-            logger.error(message)
-        finally:
-            time.sleep(RETRY_PERIOD)
+            last_alert, delay = report_error(bot, error, last_alert)
+        time.sleep(delay)
 
 
 if __name__ == '__main__':
@@ -127,4 +855,14 @@ if __name__ == '__main__':
             logging.FileHandler('program.log', encoding='UTF-8'),
         ],
     )
+    parser = argparse.ArgumentParser(
+        description='Бот, оповещающий о статусе домашних работ.'
+    )
+    parser.add_argument(
+        '--once', action='store_true',
+        help='опросить всех один раз, сохранить курсор и выйти',
+    )
+    if parser.parse_args().once:
+        sys.exit(1 if run_once() else 0)
+    profiling.install_profile_signal()
     main()
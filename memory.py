@@ -0,0 +1,85 @@
+import gc
+import logging
+import os
+import threading
+import tracemalloc
+import weakref
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+RSS_BUDGET_MB = int(os.getenv('RSS_BUDGET_MB', 0))
+MEMORY_DEBUG = os.getenv('MEMORY_DEBUG', '') == '1'
+MEMORY_TOP = int(os.getenv('MEMORY_TOP', 10))
+STATUS_CACHE_SIZE = int(os.getenv('STATUS_CACHE_SIZE', 1000))
+
+
+def current_rss():
+    """Текущий размер резидентной памяти процесса в байтах."""
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # На macOS ru_maxrss в байтах, на Linux в килобайтах; это пик, а не
+    # текущее значение, но для контроля бюджета этого достаточно.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryGuard:
+    """Следит за бюджетом RSS и, в отладке, за ростом аллокаций."""
+
+    def __init__(self, budget_mb=RSS_BUDGET_MB, debug=MEMORY_DEBUG):
+        self.budget = budget_mb * 1024 * 1024
+        self.debug = debug
+        self._caches = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def register(self, cache):
+        """Добавляет кэш в список сжимаемых при нехватке памяти."""
+        with self._lock:
+            self._caches[id(cache)] = cache
+
+    def check(self):
+        """Сжимает кэши, если процесс вышел за бюджет памяти."""
+        if self.debug:
+            self.report()
+        if not self.budget:
+            return False
+        rss = current_rss()
+        if rss is None or rss <= self.budget:
+            return False
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.shrink()
+        gc.collect()
+        logger.warning(
+            f'Память {rss // 2 ** 20} МБ больше бюджета '
+            f'{self.budget // 2 ** 20} МБ, кэши сжаты.'
+        )
+        return True
+
+    def report(self):
+        """Пишет в лог самые выросшие места аллокаций с прошлого вызова."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot()
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is None:
+            return []
+        top = snapshot.compare_to(previous, 'lineno')[:MEMORY_TOP]
+        for stat in top:
+            logger.debug(f'Память: {stat}')
+        return top
+
+
+guard = MemoryGuard()
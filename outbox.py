@@ -0,0 +1,234 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import policy
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PATH = os.getenv('OUTBOX_PATH')
+OUTBOX_BATCH = int(os.getenv('OUTBOX_BATCH', 100))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 10))
+OUTBOX_BACKOFF = float(os.getenv('OUTBOX_BACKOFF', 5))
+OUTBOX_MAX_BACKOFF = float(os.getenv('OUTBOX_MAX_BACKOFF', 3600))
+OUTBOX_RETENTION_DAYS = float(os.getenv('OUTBOX_RETENTION_DAYS', 7))
+OUTBOX_POLL = 5
+OUTBOX_PURGE_PERIOD = 3600
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    tenant TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    message_id INTEGER,
+    acked_at REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_pending
+    ON outbox (id) WHERE acked_at IS NULL;
+'''
+
+
+def make_key(tenant, homework):
+    """Ключ идемпотентности уведомления о статусе работы."""
+    return ':'.join((
+        str(tenant),
+        str(homework.get('homework_name')),
+        str(homework.get('status')),
+        str(homework.get('date_updated', '')),
+    ))
+
+
+class Outbox:
+    """Журнал уведомлений: сначала запись на диск, потом отправка.
+
+    Каждое обнаруженное изменение статуса записывается в SQLite (WAL)
+    с уникальным ключом, поэтому повторное обнаружение после рестарта
+    не создаёт дубликат. Записи копятся в памяти и фиксируются одной
+    транзакцией (group commit) перед каждой отправкой; обработчик
+    опроса вызывает flush() до того, как сдвинуть курсоры. Доставка
+    подтверждается message_id из Telegram; если процесс упадёт между
+    отправкой и подтверждением, сообщение будет отправлено повторно.
+
+    Неудачная попытка откладывает следующую с экспоненциальной паузой
+    (next_attempt_at). Ограничение частоты и отсутствие свободных ботов
+    попыткой не считаются: запись ждёт retry_after и отправляется снова.
+    """
+
+    def __init__(self, path, batch=OUTBOX_BATCH,
+                 max_attempts=OUTBOX_MAX_ATTEMPTS):
+        self.path = path
+        self.batch = batch
+        self.max_attempts = max_attempts
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+
+    def add(self, key, chat_id, text, tenant='default', not_before=None):
+        """Ставит уведомление в очередь на запись.
+
+        not_before откладывает первую попытку отправки, например до
+        конца тихих часов.
+        """
+        with self._lock:
+            self._buffer.append((
+                key, str(tenant), str(chat_id), text, time.time(),
+                not_before or 0,
+            ))
+            full = len(self._buffer) >= self.batch
+        if full:
+            self.flush()
+        self._ready.set()
+
+    def flush(self):
+        """Записывает накопленные уведомления одной транзакцией."""
+        with self._lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+            with self._db:
+                cursor = self._db.executemany(
+                    'INSERT OR IGNORE INTO outbox '
+                    '(key, tenant, chat_id, text, created_at, '
+                    'next_attempt_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    rows,
+                )
+            return cursor.rowcount
+
+    def pending(self, limit=OUTBOX_BATCH, now=None):
+        """Возвращает уведомления, которые пора отправить, по порядку."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._db.execute(
+                'SELECT id, tenant, chat_id, text FROM outbox '
+                'WHERE acked_at IS NULL AND attempts < ? '
+                'AND next_attempt_at <= ? ORDER BY id LIMIT ?',
+                (self.max_attempts, now, limit),
+            ).fetchall()
+
+    def depth(self):
+        """Количество уведомлений, ожидающих отправки."""
+        with self._lock:
+            buffered = len(self._buffer)
+            stored = self._db.execute(
+                'SELECT COUNT(*) FROM outbox '
+                'WHERE acked_at IS NULL AND attempts < ?',
+                (self.max_attempts,),
+            ).fetchone()[0]
+        return buffered + stored
+
+    def ack(self, row_id, message_id):
+        """Отмечает уведомление доставленным."""
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE outbox SET acked_at = ?, message_id = ? WHERE id = ?',
+                (time.time(), message_id, row_id),
+            )
+
+    def fail(self, row_id, error):
+        """Учитывает неудачную попытку доставки и назначает следующую.
+
+        После постоянной ошибки (чат не найден, бот заблокирован)
+        уведомление больше не отправляется. Ограничение частоты
+        попыткой не считается.
+        """
+        rule = policy.classify(error)
+        now = time.time()
+        if rule is policy.THROTTLED:
+            retry_after = getattr(error, 'retry_after', None)
+            with self._lock, self._db:
+                self._db.execute(
+                    'UPDATE outbox SET last_error = ?, next_attempt_at = ? '
+                    'WHERE id = ?',
+                    (str(error), now + (retry_after or OUTBOX_POLL), row_id),
+                )
+            return
+        attempts = self.max_attempts if rule.permanent else 1
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE outbox SET last_error = ?, '
+                'next_attempt_at = ? + MIN(?, ? * (1 << MIN(attempts, 20))), '
+                'attempts = attempts + ? WHERE id = ?',
+                (
+                    str(error), now, OUTBOX_MAX_BACKOFF, OUTBOX_BACKOFF,
+                    attempts, row_id,
+                ),
+            )
+
+    def purge(self, now=None):
+        """Удаляет доставленные уведомления старше OUTBOX_RETENTION_DAYS.
+
+        Вместе с записью уходит и её ключ, так что защита от дубликата
+        действует только в пределах срока хранения.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'DELETE FROM outbox WHERE acked_at < ?',
+                (now - OUTBOX_RETENTION_DAYS * 24 * 3600,),
+            )
+        if cursor.rowcount:
+            logger.info(f'Удалено доставленных уведомлений: {cursor.rowcount}')
+        return cursor.rowcount
+
+    def deliver(self, send, now=None):
+        """Отправляет уведомления, которые пора отправить, функцией send.
+
+        send(tenant, chat_id, text) возвращает message_id
+        или выбрасывает исключение.
+        """
+        self.flush()
+        delivered = 0
+        rows = self.pending(now=now)
+        if len(rows) == OUTBOX_BATCH:
+            self._ready.set()
+        for row_id, tenant, chat_id, text in rows:
+            try:
+                message_id = send(tenant, chat_id, text)
+            except Exception as error:
+                logger.error(f'Ошибка при отправке сообщения. {error}')
+                self.fail(row_id, error)
+                continue
+            self.ack(row_id, message_id)
+            delivered += 1
+        return delivered
+
+    def run(self, send, stop=None):
+        """Цикл потока отправки."""
+        stop = stop or threading.Event()
+        purged_at = None
+        while not stop.is_set():
+            self._ready.wait(OUTBOX_POLL)
+            self._ready.clear()
+            try:
+                self.deliver(send)
+                now = time.monotonic()
+                if purged_at is None or now - purged_at >= OUTBOX_PURGE_PERIOD:
+                    self.purge()
+                    purged_at = now
+            except Exception as error:
+                logger.error(f'Сбой отправки уведомлений: {error}')
+
+    def start(self, send):
+        """Запускает отправку уведомлений в фоновом потоке."""
+        thread = threading.Thread(
+            target=self.run, args=(send,), name='outbox-sender', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def close(self):
+        """Сбрасывает буфер и закрывает базу."""
+        self.flush()
+        self._db.close()
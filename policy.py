@@ -0,0 +1,104 @@
+import logging
+import time
+from http import HTTPStatus
+
+import requests
+import telegram
+
+import exceptions
+
+logger = logging.getLogger(__name__)
+
+
+class Policy:
+    """Реакция на ошибку: повторы, карантин и оповещение.
+
+    requeue отмечает ошибки, после которых уведомление стоит поставить
+    в очередь и отправить позже, а не отбрасывать.
+    """
+
+    def __init__(self, name, retries=0, delay=1.0, factor=2.0,
+                 quarantine=False, permanent=False, alert=True,
+                 requeue=False):
+        self.name = name
+        self.retries = retries
+        self.delay = delay
+        self.factor = factor
+        self.quarantine = quarantine
+        self.permanent = permanent
+        self.alert = alert
+        self.requeue = requeue
+
+    def backoff(self, attempt):
+        """Пауза перед повтором номер attempt (с нуля)."""
+        return self.delay * self.factor ** attempt
+
+    def __repr__(self):
+        return f'Policy({self.name!r})'
+
+
+UNAUTHORIZED = Policy('unauthorized', quarantine=True, permanent=True)
+THROTTLED = Policy('throttled', alert=False, requeue=True)
+SERVER_ERROR = Policy('server_error', retries=2, delay=2)
+UNAVAILABLE = Policy('unavailable', retries=3, delay=1, requeue=True)
+UNCONFIRMED = Policy('unconfirmed', permanent=True)
+REJECTED = Policy('rejected', permanent=True)
+BAD_RESPONSE = Policy('bad_response')
+UNKNOWN = Policy('unknown')
+
+SERVER_ERRORS = range(500, 600)
+
+# Правила проверяются по порядку: класс исключения и, для
+# EndpointStatusError, код ответа. Подклассы идут раньше базовых.
+RULES = (
+    (exceptions.EndpointStatusError,
+     (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN), UNAUTHORIZED),
+    (exceptions.EndpointStatusError,
+     (HTTPStatus.TOO_MANY_REQUESTS,), THROTTLED),
+    (exceptions.EndpointStatusError, SERVER_ERRORS, SERVER_ERROR),
+    (exceptions.NoTokenException, None, UNAUTHORIZED),
+    (telegram.error.Unauthorized, None, UNAUTHORIZED),
+    (telegram.error.InvalidToken, None, UNAUTHORIZED),
+    (telegram.error.RetryAfter, None, THROTTLED),
+    (exceptions.NoSenderAvailable, None, THROTTLED),
+    (exceptions.MessageMaybeSent, None, UNCONFIRMED),
+    (telegram.error.BadRequest, None, REJECTED),
+    (telegram.error.TimedOut, None, UNCONFIRMED),
+    (telegram.error.NetworkError, None, UNAVAILABLE),
+    (exceptions.EndpointNotAnswer, None, UNAVAILABLE),
+    (exceptions.NoResponceException, None, UNAVAILABLE),
+    (exceptions.MessageException, None, UNAVAILABLE),
+    (requests.RequestException, None, UNAVAILABLE),
+    (exceptions.StatusError, None, BAD_RESPONSE),
+    (KeyError, None, BAD_RESPONSE),
+    (TypeError, None, BAD_RESPONSE),
+    (ValueError, None, BAD_RESPONSE),
+)
+
+
+def classify(error):
+    """Подбирает политику для исключения по таблице RULES."""
+    for error_class, codes, policy in RULES:
+        if not isinstance(error, error_class):
+            continue
+        if codes is None or getattr(error, 'status_code', None) in codes:
+            return policy
+    return UNKNOWN
+
+
+def call(func, *args, sleep=time.sleep, **kwargs):
+    """Вызывает func, повторяя её при временных ошибках."""
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            policy = classify(error)
+            if attempt >= policy.retries:
+                raise
+            delay = policy.backoff(attempt)
+            attempt += 1
+            logger.warning(
+                f'{error} ({policy.name}), повтор через {delay} сек.'
+            )
+            sleep(delay)
@@ -0,0 +1,172 @@
+import collections
+import functools
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '') == '1'
+PROFILE_SECONDS = int(os.getenv('PROFILE_SECONDS', 30))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '.')
+
+
+class SpanRecorder:
+    """Накапливает длительности этапов работы бота."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration):
+        """Сохраняет длительность одного выполнения этапа."""
+        with self._lock:
+            count, total, worst = self.stats.get(name, (0, 0.0, 0.0))
+            self.stats[name] = (
+                count + 1, total + duration, max(worst, duration)
+            )
+
+    def summary(self):
+        """Возвращает статистику по этапам: количество, среднее, максимум."""
+        with self._lock:
+            return {
+                name: {
+                    'count': count,
+                    'avg': total / count,
+                    'max': worst,
+                }
+                for name, (count, total, worst) in self.stats.items()
+            }
+
+    def reset(self):
+        """Очищает накопленную статистику."""
+        with self._lock:
+            self.stats.clear()
+
+
+recorder = SpanRecorder(enabled=PROFILING_ENABLED)
+
+
+class span:
+    """Контекстный менеджер, замеряющий длительность этапа."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if recorder.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            recorder.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timed(name=None):
+    """Декоратор, записывающий длительность вызова функции."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(span_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler(threading.Thread):
+    """Периодически снимает стеки всех потоков и пишет их на диск."""
+
+    def __init__(self, seconds=PROFILE_SECONDS, interval=PROFILE_INTERVAL,
+                 directory=PROFILE_DIR):
+        super().__init__(name='sampling-profiler', daemon=True)
+        self.seconds = seconds
+        self.interval = interval
+        self.directory = directory
+        self.samples = collections.Counter()
+        self.path = None
+
+    def run(self):
+        """Собирает сэмплы в течение заданного времени."""
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[self._collapse(frame)] += 1
+            time.sleep(self.interval)
+        self.path = self.dump()
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                f'{code.co_name} ({os.path.basename(code.co_filename)}'
+                f':{frame.f_lineno})'
+            )
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def dump(self):
+        """Сохраняет стеки в формате collapsed stacks и сводку по этапам."""
+        path = os.path.join(
+            self.directory, f'profile-{os.getpid()}-{int(time.time())}.txt'
+        )
+        with open(path, 'w', encoding='UTF-8') as file:
+            for stack, count in self.samples.most_common():
+                file.write(f'{stack} {count}\n')
+            for name, stat in recorder.summary().items():
+                file.write(
+                    f'# span {name} count={stat["count"]} '
+                    f'avg={stat["avg"]:.6f} max={stat["max"]:.6f}\n'
+                )
+        logger.info(f'Профиль сохранён в {path}')
+        return path
+
+
+def start_profiling(seconds=PROFILE_SECONDS):
+    """Запускает сэмплирующий профилировщик в фоновом потоке."""
+    profiler = SamplingProfiler(seconds=seconds)
+    profiler.start()
+    return profiler
+
+
+def install_profile_signal(signum=None):
+    """Включает снятие профиля по сигналу (по умолчанию SIGUSR1).
+
+    Пока снимается профиль, повторные сигналы пропускаются.
+    """
+    signum = signum or getattr(signal, 'SIGUSR1', None)
+    if signum is None:
+        logger.warning('Платформа не поддерживает профилирование по сигналу.')
+        return
+
+    profiler = None
+
+    def handler(received, frame):
+        nonlocal profiler
+        if profiler is not None and profiler.is_alive():
+            logger.warning('Профиль уже снимается, сигнал пропущен.')
+            return
+        logger.info(f'Снимаем профиль {PROFILE_SECONDS} сек.')
+        profiler = start_profiling()
+
+    signal.signal(signum, handler)
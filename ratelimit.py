@@ -0,0 +1,126 @@
+import contextlib
+import logging
+import os
+import struct
+import threading
+import time
+
+import profiling
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 0))
+API_RATE_BURST = float(os.getenv('API_RATE_BURST', 0))
+API_RATE_FILE = os.getenv('API_RATE_FILE')
+STATE_FORMAT = 'dd'
+STATE_SIZE = struct.calcsize(STATE_FORMAT)
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов по алгоритму token bucket.
+
+    Если задан path, состояние хранится в файле под блокировкой flock
+    и делится между всеми процессами на хосте. Без fcntl (Windows)
+    ограничение действует только внутри процесса.
+    """
+
+    def __init__(self, rate, capacity=None, path=None,
+                 metric='rate_limit_wait'):
+        self.rate = rate
+        self.metric = metric
+        self.capacity = capacity or max(1.0, rate)
+        self.path = path if fcntl else None
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self.waits = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    @contextlib.contextmanager
+    def _state(self):
+        with self._lock:
+            if self.path is None:
+                yield
+                return
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.pread(fd, STATE_SIZE, 0)
+                if len(data) == STATE_SIZE:
+                    self._tokens, self._updated = struct.unpack(
+                        STATE_FORMAT, data
+                    )
+                yield
+                os.pwrite(
+                    fd, struct.pack(STATE_FORMAT, self._tokens, self._updated),
+                    0,
+                )
+            finally:
+                os.close(fd)
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Берёт токен, если он есть; иначе возвращает время ожидания."""
+        with self._state():
+            self._refill(time.time())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def delay(self, tokens=1):
+        """Через сколько секунд наберётся tokens токенов; ничего не берёт."""
+        with self._state():
+            self._refill(time.time())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens=1):
+        """Берёт токен, при необходимости дожидаясь его появления."""
+        with self._state():
+            self._refill(time.time())
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+        if wait:
+            self.record_wait(wait)
+            logger.debug(f'Ожидание лимита запросов {wait:.2f} сек.')
+            time.sleep(wait)
+        return wait
+
+    def record_wait(self, wait):
+        """Учитывает ожидание токена в счётчиках и в профиле этапов."""
+        with self._lock:
+            self.waits += 1
+            self.waited += wait
+            self.max_wait = max(self.max_wait, wait)
+        profiling.recorder.record(self.metric, wait)
+
+    def stats(self):
+        """Сколько раз и как долго приходилось ждать токен."""
+        return {
+            'rate': self.rate,
+            'waits': self.waits,
+            'waited': self.waited,
+            'max_wait': self.max_wait,
+        }
+
+    def drain(self):
+        """Обнуляет запас токенов, например после ответа 429."""
+        with self._state():
+            self._refill(time.time())
+            self._tokens = min(self._tokens, 0.0)
+
+
+limiter = (
+    TokenBucket(API_RATE_LIMIT, API_RATE_BURST, API_RATE_FILE)
+    if API_RATE_LIMIT else None
+)
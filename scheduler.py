@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import os
+import time
+
+POLL_BUDGET = int(os.getenv('POLL_BUDGET', 0))
+MIN_INTERVAL = int(os.getenv('MIN_POLL_INTERVAL', 60))
+MAX_INTERVAL = int(os.getenv('MAX_POLL_INTERVAL', 6 * 3600))
+MAX_BACKOFF_STEPS = 5
+CHANGE_RATE_WEIGHT = 0.3
+COMPACT_SLACK = 64
+
+# Чем меньше множитель, тем чаще опрашивается пользователь.
+STATUS_FACTORS = {
+    'reviewing': 0.25,
+    'rejected': 0.5,
+    None: 1,
+    'approved': 2,
+}
+STATUS_PRIORITIES = {
+    'reviewing': 0,
+    'rejected': 1,
+    None: 2,
+    'approved': 3,
+}
+
+
+class TenantStats:
+    """История опросов пользователя, по которой считается интервал."""
+
+    __slots__ = ('status', 'change_rate', 'errors', 'interval')
+
+    def __init__(self, interval):
+        self.status = None
+        self.change_rate = 0.0
+        self.errors = 0
+        self.interval = interval
+
+
+class Scheduler:
+    """Очередь опросов с приоритетом по статусу и общим бюджетом запросов.
+
+    Интервал пользователя зависит от последнего статуса работы, частоты
+    изменений и числа ошибок подряд. Если суммарная частота опросов
+    превышает бюджет (запросов за base_interval), все интервалы
+    пропорционально растягиваются.
+    """
+
+    def __init__(self, base_interval, budget=None,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.base_interval = base_interval
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stats = {}
+        self.demand = 0.0
+        self._heap = []
+        self._due = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._due)
+
+    def _push(self, name, due):
+        priority = STATUS_PRIORITIES.get(self.stats[name].status, 2)
+        self._due[name] = due
+        heapq.heappush(self._heap, (due, priority, next(self._counter), name))
+        if len(self._heap) > 2 * len(self._due) + COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self):
+        """Удаляет из кучи устаревшие записи отложенных опросов."""
+        self._heap = [
+            entry for entry in self._heap
+            if self._due.get(entry[3]) == entry[0]
+        ]
+        heapq.heapify(self._heap)
+
+    def _raw_interval(self, stats):
+        interval = (
+            self.base_interval
+            * STATUS_FACTORS.get(stats.status, 1)
+            / (1 + stats.change_rate)
+            * 2 ** min(stats.errors, MAX_BACKOFF_STEPS)
+        )
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _set_interval(self, stats, interval):
+        self.demand += 1 / interval - 1 / stats.interval
+        stats.interval = interval
+
+    def scale(self):
+        """Во сколько раз растянуть интервалы, чтобы уложиться в бюджет."""
+        if not self.budget:
+            return 1
+        capacity = self.budget / self.base_interval
+        return max(1, self.demand / capacity)
+
+    def add(self, name, now=None):
+        """Добавляет пользователя и ставит его опрос в очередь немедленно."""
+        now = time.monotonic() if now is None else now
+        if name not in self.stats:
+            self.stats[name] = TenantStats(self.base_interval)
+            self.demand += 1 / self.base_interval
+        self._push(name, now)
+
+    def remove(self, name):
+        """Убирает пользователя из очереди."""
+        stats = self.stats.pop(name, None)
+        if stats is not None:
+            self.demand -= 1 / stats.interval
+        self._due.pop(name, None)
+
+    def record(self, name, status=None, changed=False, failed=False,
+               now=None):
+        """Учитывает результат опроса и планирует следующий."""
+        now = time.monotonic() if now is None else now
+        stats = self.stats[name]
+        if failed:
+            stats.errors += 1
+        else:
+            stats.errors = 0
+            if status is not None:
+                stats.status = status
+            stats.change_rate = (
+                (1 - CHANGE_RATE_WEIGHT) * stats.change_rate
+                + CHANGE_RATE_WEIGHT * bool(changed)
+            )
+        self._set_interval(stats, self._raw_interval(stats))
+        delay = min(stats.interval * self.scale(), self.max_interval)
+        self._push(name, now + delay)
+        return delay
+
+    def postpone(self, name, delay, now=None):
+        """Откладывает опрос пользователя на delay секунд."""
+        now = time.monotonic() if now is None else now
+        if name in self.stats:
+            self._push(name, now + delay)
+
+    def due(self, name):
+        """Время следующего опроса пользователя или None."""
+        return self._due.get(name)
+
+    def pop_due(self, now=None):
+        """Извлекает всех пользователей, чей опрос уже пора выполнить."""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, priority, _, name = heapq.heappop(self._heap)
+            if self._due.get(name) == when:
+                del self._due[name]
+                due.append((priority, when, name))
+        return [name for _, _, name in sorted(due)]
+
+    def next_delay(self, now=None):
+        """Сколько секунд осталось до ближайшего опроса."""
+        now = time.monotonic() if now is None else now
+        while self._heap:
+            when, _, _, name = self._heap[0]
+            if self._due.get(name) == when:
+                break
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return self.base_interval
+        return max(0, self._heap[0][0] - now)
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import telegram
+
+import exceptions
+import ratelimit
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_TOKENS = [
+    token for token in os.getenv('TELEGRAM_TOKENS', '').split(',') if token
+]
+BOT_RATE_LIMIT = float(os.getenv('BOT_RATE_LIMIT', 25))
+BOT_COOLDOWN = int(os.getenv('BOT_COOLDOWN', 60))
+
+
+def revoked(error):
+    """Отклонён ли сам токен бота (401), а не доступ к чату (403)."""
+    if isinstance(error, telegram.error.InvalidToken):
+        return True
+    return (
+        isinstance(error, telegram.error.Unauthorized)
+        and not str(error).startswith('Forbidden')
+    )
+
+
+class BotSender:
+    """Бот из пула со своим лимитом и счётчиками."""
+
+    def __init__(self, token, factory):
+        self.token = token
+        self.bot = factory(token=token)
+        self.bucket = ratelimit.TokenBucket(
+            BOT_RATE_LIMIT, metric='bot_rate_wait'
+        )
+        self.sent = 0
+        self.failed = 0
+        self.waited = 0.0
+        self.down_until = 0.0
+
+    @property
+    def available(self):
+        """Можно ли отправлять сообщения через этого бота."""
+        return self.down_until <= time.monotonic()
+
+    def send(self, chat_id, text):
+        """Отправляет сообщение с учётом лимита бота."""
+        self.waited += self.bucket.acquire()
+        sent = self.bot.send_message(chat_id=chat_id, text=text)
+        self.sent += 1
+        return getattr(sent, 'message_id', None)
+
+
+class SenderPool:
+    """Пул ботов Telegram для обхода лимита одного бота.
+
+    Каждый чат закреплён за ботом через rendezvous-хеширование, так
+    что добавление бота переносит только часть чатов. При ошибке бот
+    выводится из ротации на BOT_COOLDOWN секунд (или на retry_after),
+    а сообщение уходит следующему боту из порядка для этого чата.
+    Последний доступный бот из ротации не выводится: его ошибка
+    передаётся вызывающему. Резервный бот сможет написать пользователю,
+    только если тот тоже запускал этого бота.
+
+    Личные боты пользователей (private) в хешировании не участвуют:
+    такой бот пишет только в чаты своего пользователя, когда его
+    передают как preferred.
+    """
+
+    def __init__(self, tokens, factory=telegram.Bot, private=()):
+        self.senders = [BotSender(token, factory) for token in tokens]
+        self._by_token = {sender.token: sender for sender in self.senders}
+        for token in private:
+            if token not in self._by_token:
+                self._by_token[token] = BotSender(token, factory)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _weight(token, chat_id):
+        digest = hashlib.blake2b(
+            f'{token}:{chat_id}'.encode(), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, 'big')
+
+    def candidates(self, chat_id, preferred=None):
+        """Боты в порядке попыток отправки в чат."""
+        ordered = sorted(
+            self.senders,
+            key=lambda sender: self._weight(sender.token, chat_id),
+            reverse=True,
+        )
+        sender = self._by_token.get(preferred)
+        if sender is not None:
+            if sender in ordered:
+                ordered.remove(sender)
+            ordered.insert(0, sender)
+        return ordered
+
+    def retry_after(self):
+        """Через сколько секунд освободится ближайший бот."""
+        now = time.monotonic()
+        return max(
+            min(sender.down_until for sender in self.senders) - now, 0.0
+        )
+
+    def send(self, chat_id, text, preferred=None):
+        """Отправляет сообщение и возвращает его message_id.
+
+        Если все боты на паузе, выбрасывает NoSenderAvailable: сообщение
+        нужно отправить позже. TimedOut не передаётся другому боту,
+        ведь сообщение могло уйти; вместо него выбрасывается
+        MessageMaybeSent.
+        """
+        last_error = None
+        for sender in self.candidates(chat_id, preferred):
+            if not sender.available:
+                continue
+            try:
+                return sender.send(chat_id, text)
+            except telegram.error.TimedOut as error:
+                sender.failed += 1
+                raise exceptions.MessageMaybeSent(
+                    f'Нет ответа Telegram, сообщение могло уйти: {error}'
+                )
+            except Exception as error:
+                self._failed(sender, error)
+                last_error = error
+        if last_error is not None and any(
+            sender.available for sender in self.senders
+        ):
+            raise last_error
+        raise exceptions.NoSenderAvailable(
+            'Нет доступных ботов для отправки.', self.retry_after()
+        )
+
+    def _failed(self, sender, error):
+        """Выводит бота из ротации, если ошибка относится к нему.
+
+        Ошибку последнего доступного бота выбрасывает дальше.
+        """
+        if isinstance(error, telegram.error.RetryAfter):
+            self._disable(sender, error.retry_after, error)
+        elif revoked(error):
+            self._disable(sender, BOT_COOLDOWN, error)
+        elif isinstance(error, (
+            telegram.error.BadRequest, telegram.error.Unauthorized
+        )):
+            # Ошибка относится к чату, а не к боту: пробуем другого.
+            sender.failed += 1
+        elif not self._disable(sender, BOT_COOLDOWN, error, keep_last=True):
+            raise error
+
+    def _disable(self, sender, seconds, error, keep_last=False):
+        with self._lock:
+            sender.failed += 1
+            if keep_last and not any(
+                other.available for other in self.senders
+                if other is not sender
+            ):
+                return False
+            sender.down_until = time.monotonic() + seconds
+        logger.warning(
+            f'Бот {sender.token.split(":")[0]} отключён на {seconds} сек.: '
+            f'{error}'
+        )
+        return True
+
+    def stats(self):
+        """Счётчики отправок по ботам."""
+        return {
+            sender.token.split(':')[0]: {
+                'sent': sender.sent,
+                'failed': sender.failed,
+                'waited': sender.waited,
+                'available': sender.available,
+            }
+            for sender in self._by_token.values()
+        }
@@ -0,0 +1,125 @@
+"""Проверка памяти при долгой работе на заглушках API и Telegram.
+
+Гоняет TenantWorker в виртуальном времени и сравнивает объём памяти,
+занятой Python-объектами, после прогрева и в конце прогона.
+
+    python soak.py --hours 72 --tenants 200
+"""
+import argparse
+import gc
+import logging
+import random
+import sys
+import tracemalloc
+
+import homework
+import senders
+import tenants
+import transport
+
+STATUSES = list(homework.HOMEWORK_VERDICTS)
+
+
+class VirtualClock:
+    """Часы, которые двигаются только вручную."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        """Сдвигает время вперёд."""
+        self.now += seconds
+
+
+def build_worker(tenant_count, clock):
+    """Создаёт обработчик с заглушками вместо сети."""
+    practicum = transport.FakePracticum()
+    bots = transport.FakeTelegram(keep=10)
+    registry = tenants.TenantRegistry(
+        [
+            tenants.Tenant(
+                f'tenant{number}', f'token{number}', number, '1:soak',
+                transport=practicum,
+            )
+            for number in range(tenant_count)
+        ],
+        homework.ENDPOINT,
+        bot_factory=bots,
+    )
+    worker = homework.TenantWorker(registry, clock=clock)
+    worker.start()
+    return worker, practicum, bots
+
+
+def traced_memory():
+    """Объём памяти, занятой объектами Python, после сборки мусора."""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def soak(hours, tenant_count, projects, change_rate, seed=0):
+    """Прогоняет обработчик и возвращает память после прогрева и в конце."""
+    random.seed(seed)
+    # Лимит Telegram в виртуальном времени не нужен: он бы ждал по-настоящему.
+    senders.BOT_RATE_LIMIT = 1e9
+    clock = VirtualClock()
+    worker, practicum, bots = build_worker(tenant_count, clock)
+    # Все работы существуют с начала, а имена создаются один раз, чтобы
+    # рост состояния заглушки не маскировал утечки самого бота.
+    tokens = [f'token{number}' for number in range(tenant_count)]
+    names = [f'project{project}' for project in range(projects)]
+    for token in tokens:
+        for name in names:
+            practicum.set_status(token, name, random.choice(STATUSES))
+    finish = hours * 3600
+    warmup = finish / 10
+    baseline = None
+    changes = 0.0
+    while clock.now < finish:
+        worker.tick()
+        step = max(worker.plan.next_delay(clock()), 1)
+        clock.advance(step)
+        changes += tenant_count * change_rate * step / 3600
+        while changes >= 1:
+            changes -= 1
+            practicum.set_status(
+                random.choice(tokens), random.choice(names),
+                random.choice(STATUSES),
+            )
+        if baseline is None and clock.now >= warmup:
+            baseline = traced_memory()
+    return baseline, traced_memory(), bots.sent, practicum.calls
+
+
+def main():
+    """Разбирает аргументы, запускает прогон и проверяет рост памяти."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--change-rate', type=float, default=0.5,
+                        help='смен статуса на пользователя в час')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='допустимый рост памяти, доля от начальной')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    tracemalloc.start()
+    baseline, final, sent, calls = soak(
+        args.hours, args.tenants, args.projects, args.change_rate
+    )
+    growth = (final - baseline) / baseline
+    print(
+        f'Запросов: {calls}, сообщений: {sent}, память после прогрева: '
+        f'{baseline // 1024} КБ, в конце: {final // 1024} КБ '
+        f'({growth:+.1%}).'
+    )
+    if growth > args.tolerance:
+        print('Память растёт.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import codecs
+import json
+import os
+import re
+
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', '') == '1'
+STREAM_CHUNK = int(os.getenv('STREAM_CHUNK', 16 * 1024))
+
+WHITESPACE = re.compile(r'\s*')
+DECODER = json.JSONDecoder()
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API без загрузки всего тела в память.
+
+    Итерация по объекту выдаёт работы из списка homeworks по мере
+    поступления данных. Остальные ключи верхнего уровня (current_date)
+    попадают в fields; полностью они известны после окончания итерации.
+    В памяти держится только текущий кусок ответа и одна запись.
+    """
+
+    def __init__(self, chunks, key='homeworks'):
+        self.key = key
+        self.fields = {}
+        self.count = 0
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b''
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk, final=self._eof)
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError('Ответ API оборвался.')
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char not in chars:
+            raise ValueError(
+                f'Некорректный JSON в ответе API: ожидался один из {chars}.'
+            )
+        self._pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Число в конце куска может продолжиться в следующем.
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def _homeworks(self):
+        if self._peek() != '[':
+            raise TypeError('Неверные данные.')
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            homework = self._value()
+            self.count += 1
+            yield homework
+            if self._expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        if self._peek() != '{':
+            raise TypeError('Необрабатываемый ответ API.')
+        self._pos += 1
+        found = False
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(':')
+                if key == self.key:
+                    found = True
+                    yield from self._homeworks()
+                else:
+                    self.fields[key] = self._value()
+                if self._expect(',}') == '}':
+                    break
+        if not found:
+            raise KeyError('Ошибка в ответе API, ключ homeworks не найден.')
@@ -0,0 +1,95 @@
+import datetime
+import fnmatch
+import re
+import zoneinfo
+
+QUIET_HOURS = re.compile(r'^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$')
+
+
+def parse_quiet_hours(value):
+    """Разбирает интервал вида '23:00-08:00' в минуты от начала суток."""
+    match = QUIET_HOURS.match(value.replace(' ', ''))
+    if not match:
+        raise ValueError(f'Неверный формат тихих часов: {value!r}.')
+    start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+    if max(start_hour, end_hour) > 23 or max(start_minute, end_minute) > 59:
+        raise ValueError(f'Неверное время в тихих часах: {value!r}.')
+    return start_hour * 60 + start_minute, end_hour * 60 + end_minute
+
+
+def compile_filter(statuses=None, projects=None):
+    """Собирает из правил одну функцию-предикат для работы.
+
+    Пустые правила пропускают всё; тогда возвращается None, и проверку
+    можно не вызывать вовсе.
+    """
+    checks = []
+    if statuses:
+        allowed = frozenset(statuses)
+        checks.append(lambda homework: homework.get('status') in allowed)
+    if projects:
+        pattern = re.compile(
+            '|'.join(f'(?:{fnmatch.translate(project)})'
+                     for project in projects)
+        ).match
+        checks.append(
+            lambda homework: pattern(homework.get('homework_name', ''))
+            is not None
+        )
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    first, second = checks
+    return lambda homework: first(homework) and second(homework)
+
+
+class Subscription:
+    """На какие изменения подписан пользователь и когда их присылать.
+
+    statuses — нужные статусы, projects — шаблоны имён работ
+    (fnmatch), quiet_hours — интервал 'ЧЧ:ММ-ЧЧ:ММ', в который
+    уведомления откладываются до его окончания, timezone — часовой
+    пояс тихих часов (по умолчанию локальный).
+    """
+
+    def __init__(self, statuses=None, projects=None, quiet_hours=None,
+                 timezone=None):
+        self.match = compile_filter(statuses, projects)
+        self.quiet = parse_quiet_hours(quiet_hours) if quiet_hours else None
+        self.timezone = zoneinfo.ZoneInfo(timezone) if timezone else None
+
+    @classmethod
+    def from_config(cls, config):
+        """Создаёт подписку из записи TENANTS_FILE."""
+        config = config or {}
+        return cls(
+            statuses=config.get('statuses'),
+            projects=config.get('projects'),
+            quiet_hours=config.get('quiet_hours'),
+            timezone=config.get('timezone'),
+        )
+
+    def wants(self, homework):
+        """Нужно ли уведомлять пользователя об этой работе."""
+        return self.match is None or self.match(homework)
+
+    def quiet_until(self, now):
+        """Время конца тихих часов, если now в них попадает, иначе None."""
+        if self.quiet is None:
+            return None
+        start, end = self.quiet
+        local = datetime.datetime.fromtimestamp(now, self.timezone)
+        minutes = local.hour * 60 + local.minute
+        if start <= end:
+            inside = start <= minutes < end
+        else:
+            inside = minutes >= start or minutes < end
+        if not inside:
+            return None
+        release = local.replace(
+            hour=end // 60, minute=end % 60, second=0, microsecond=0
+        )
+        if release <= local:
+            release += datetime.timedelta(days=1)
+        return release.timestamp()
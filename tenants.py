@@ -0,0 +1,225 @@
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+
+import telegram
+
+import ratelimit
+import subscriptions
+import transport
+
+logger = logging.getLogger(__name__)
+
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 3600))
+QUARANTINE_PERIOD = int(os.getenv('QUARANTINE_PERIOD', 6 * 3600))
+VALIDATION_WORKERS = int(os.getenv('VALIDATION_WORKERS', 16))
+VALIDATION_TIMEOUT = 10
+
+VALID = 'valid'
+INVALID = 'invalid'
+UNKNOWN = 'unknown'
+
+
+class Tenant:
+    """Пользователь бота: токен Практикума и чат для уведомлений."""
+
+    def __init__(self, name, practicum_token, chat_id, telegram_token,
+                 endpoint=None, auth_scheme='OAuth', transport=None,
+                 subscription=None):
+        self.name = name
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.telegram_token = telegram_token
+        self.endpoint = endpoint
+        self.auth_scheme = auth_scheme
+        self.transport = transport
+        self.subscription = subscription or subscriptions.Subscription()
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API Практикума."""
+        return {
+            'Authorization': f'{self.auth_scheme} {self.practicum_token}'
+        }
+
+    def __repr__(self):
+        return f'Tenant({self.name!r})'
+
+
+def load_tenants(practicum_token, chat_id, telegram_token, path=None):
+    """Загружает пользователей из JSON-файла или из переменных окружения."""
+    path = path or TENANTS_FILE
+    if not path:
+        return [Tenant('default', practicum_token, chat_id, telegram_token)]
+    with open(path, encoding='UTF-8') as file:
+        records = json.load(file)
+    return [
+        Tenant(
+            record['name'],
+            record['practicum_token'],
+            record['chat_id'],
+            record.get('telegram_token') or telegram_token,
+            endpoint=record.get('endpoint'),
+            auth_scheme=record.get('auth_scheme', 'OAuth'),
+            subscription=subscriptions.Subscription.from_config(
+                record.get('subscription')
+            ),
+        )
+        for record in records
+    ]
+
+
+class TTLCache:
+    """Потокобезопасный словарь, записи которого устаревают через ttl."""
+
+    def __init__(self, ttl=TOKEN_CACHE_TTL):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Возвращает значение, если оно ещё не устарело."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        """Сохраняет значение на ttl секунд."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+
+    def pop(self, key):
+        """Удаляет значение из кэша."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def check_practicum_token(tenant, endpoint, client):
+    """Проверяет токен Практикума пробным запросом в счёт лимита."""
+    if ratelimit.limiter:
+        ratelimit.limiter.acquire()
+    try:
+        response = client.get(
+            tenant.endpoint or endpoint,
+            headers=tenant.headers,
+            params={'from_date': int(time.time())},
+            timeout=VALIDATION_TIMEOUT,
+        )
+    except Exception as error:
+        logger.warning(f'Не удалось проверить токен Практикума: {error}')
+        return UNKNOWN
+    if response.status_code == HTTPStatus.OK:
+        return VALID
+    if response.status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+        return INVALID
+    return UNKNOWN
+
+
+def check_telegram_token(token, bot_factory):
+    """Проверяет токен бота методом getMe."""
+    try:
+        bot_factory(token=token).get_me()
+    except (telegram.error.InvalidToken, telegram.error.Unauthorized):
+        return INVALID
+    except Exception as error:
+        logger.warning(f'Не удалось проверить токен Telegram: {error}')
+        return UNKNOWN
+    return VALID
+
+
+class TenantRegistry:
+    """Список пользователей с кэшем проверок токенов и карантином."""
+
+    def __init__(self, tenants, endpoint, cache=None,
+                 quarantine_period=QUARANTINE_PERIOD, client=None,
+                 bot_factory=telegram.Bot):
+        self.tenants = {tenant.name: tenant for tenant in tenants}
+        self.endpoint = endpoint
+        self.client = client or transport.default_transport
+        self.bot_factory = bot_factory
+        self.cache = cache if cache is not None else TTLCache()
+        self.quarantine_period = quarantine_period
+        self.quarantined = {}
+
+    def _check(self, key, tenant):
+        kind, token = key
+        if kind == 'practicum':
+            return check_practicum_token(
+                tenant, self.endpoint, tenant.transport or self.client
+            )
+        return check_telegram_token(token, self.bot_factory)
+
+    def validate(self, names=None):
+        """Параллельно проверяет токены и отправляет в карантин неверные."""
+        names = list(self.tenants) if names is None else list(names)
+        keys = {}
+        pending = {}
+        for name in names:
+            tenant = self.tenants[name]
+            keys[name] = (
+                ('practicum', tenant.practicum_token),
+                ('telegram', tenant.telegram_token),
+            )
+            for key in keys[name]:
+                if self.cache.get(key) is None:
+                    pending.setdefault(key, tenant)
+        if pending:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(VALIDATION_WORKERS, len(pending))
+            ) as executor:
+                results = dict(zip(pending, executor.map(
+                    self._check, pending.keys(), pending.values()
+                )))
+            for key, result in results.items():
+                if result != UNKNOWN:
+                    self.cache.set(key, result)
+        invalid = []
+        for name, pair in keys.items():
+            if any(self.cache.get(key) == INVALID for key in pair):
+                self.quarantine(name, 'токен отклонён')
+                invalid.append(name)
+            else:
+                self.quarantined.pop(name, None)
+        return invalid
+
+    def quarantine(self, name, reason):
+        """Исключает пользователя из опроса до следующей проверки."""
+        if name not in self.quarantined:
+            logger.error(f'Пользователь {name} в карантине: {reason}')
+        self.quarantined[name] = time.monotonic() + self.quarantine_period
+
+    def recheck_quarantined(self):
+        """Повторно проверяет пользователей, у которых истёк карантин."""
+        now = time.monotonic()
+        due = [
+            name for name, recheck_at in self.quarantined.items()
+            if recheck_at <= now
+        ]
+        for name in due:
+            tenant = self.tenants[name]
+            self.cache.pop(('practicum', tenant.practicum_token))
+            self.cache.pop(('telegram', tenant.telegram_token))
+        if due:
+            self.validate(due)
+        return due
+
+    def active(self):
+        """Возвращает пользователей, которых можно опрашивать."""
+        return [
+            tenant for name, tenant in self.tenants.items()
+            if name not in self.quarantined
+        ]
@@ -1,9 +1,15 @@
 import random
 import string
+import threading
 from datetime import datetime
+from http.server import ThreadingHTTPServer
 
 import pytest
 
+import tenants
+import transport
+import utils
+
 
 @pytest.fixture
 def random_timestamp():
@@ -29,3 +35,46 @@ def random_message():
         letters = string.ascii_letters
         return ''.join(random.choice(letters) for _ in range(string_length))
     return random_string()
+
+
+@pytest.fixture
+def practicum():
+    return transport.FakePracticum()
+
+
+@pytest.fixture
+def telegram_fake():
+    return transport.FakeTelegram()
+
+
+@pytest.fixture
+def registry(homework_module, practicum, telegram_fake):
+    return tenants.TenantRegistry(
+        [
+            tenants.Tenant(
+                name, f'token-{name}', chat_id, '1234:abcdefg',
+                transport=practicum,
+            )
+            for chat_id, name in enumerate(['alice', 'bob'])
+        ],
+        homework_module.ENDPOINT,
+        bot_factory=telegram_fake,
+    )
+
+
+@pytest.fixture
+def worker(homework_module, registry):
+    worker = homework_module.TenantWorker(registry)
+    worker.start()
+    return worker
+
+
+@pytest.fixture
+def keepalive_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), utils.KeepAliveHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
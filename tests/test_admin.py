@@ -0,0 +1,90 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import admin
+
+
+@pytest.fixture
+def server(worker):
+    server = admin.AdminServer(worker, '127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, method='GET'):
+    url = f'http://127.0.0.1:{server.server_address[1]}{path}'
+    with urllib.request.urlopen(
+        urllib.request.Request(url, method=method)
+    ) as response:
+        return response.status, json.loads(response.read())
+
+
+class TestAdmin:
+
+    def test_overview_lists_tenants(self, server, worker, practicum):
+        practicum.set_status('token-alice', 'hw1', 'approved')
+        worker.tick()
+        status, data = request(server, '/')
+        assert status == 200
+        tenants = {tenant['name']: tenant for tenant in data['tenants']}
+        assert set(tenants) == {'alice', 'bob'}
+        assert tenants['alice']['status'] == 'approved'
+        assert 'hw1' in tenants['alice']['message']
+        assert tenants['alice']['circuit'] == 'closed'
+        assert tenants['alice']['next_poll_in'] > 0
+        assert data['outbox_depth'] == 0
+
+    def test_pause_and_force_poll(self, server, worker, practicum,
+                                  telegram_fake):
+        worker.tick()
+        assert request(server, '/tenants/alice/pause', 'POST')[0] == 202
+        worker.run_commands(worker.clock())
+        assert request(server, '/tenants/alice')[1]['paused']
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        request(server, '/tenants/alice/poll', 'POST')
+        worker.tick()
+        assert len(telegram_fake.messages) == 1
+
+    def test_unknown_tenant(self, server):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(server, '/tenants/nobody/pause', 'POST')
+        assert error.value.code == 404
+
+    def test_quarantined_tenant_cannot_be_polled(self, homework_module,
+                                                 registry, practicum):
+        practicum.fail('token-bob', 401)
+        worker = homework_module.TenantWorker(registry)
+        worker.start()
+        server = admin.AdminServer(worker, '127.0.0.1', 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                request(server, '/tenants/bob/poll', 'POST')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert error.value.code == 409
+        worker.commands.put(('bob', 'poll'))
+        worker.tick()
+        assert 'bob' in worker.registry.quarantined
+
+    def test_unscheduled_tenant_is_added_to_plan(self, worker, practicum):
+        worker.plan.remove('alice')
+        assert worker.command('alice', 'poll')
+        calls = practicum.calls
+        worker.run_commands(worker.clock())
+        assert practicum.calls == calls + 1
+        assert worker.plan.due('alice') is not None
+
+    def test_public_host_is_refused(self, worker):
+        with pytest.raises(ValueError):
+            admin.AdminServer(worker, '0.0.0.0', 0)
+        assert admin.start(worker, '0.0.0.0', 8080) is None
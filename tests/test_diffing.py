@@ -0,0 +1,87 @@
+import pytest
+
+import diffing
+
+STATUSES = ['approved', 'reviewing', 'rejected']
+BACKENDS = [False] + ([True] if diffing.load_numpy() is not None else [])
+
+
+@pytest.fixture(params=BACKENDS, ids=['array', 'numpy'][:len(BACKENDS)])
+def table(request):
+    return diffing.StatusTable(STATUSES, maxsize=4, use_numpy=request.param)
+
+
+class TestStatusTable:
+
+    def test_only_changed_rows_are_returned(self, table):
+        keys = [('alice', 'hw1'), ('alice', 'hw2'), ('bob', 'hw1')]
+        assert table.diff(keys, table.encode(
+            ['approved', 'reviewing', 'rejected']
+        )) == [0, 1, 2]
+        assert table.diff(keys, table.encode(
+            ['approved', 'approved', 'rejected']
+        )) == [1]
+        assert table.diff(keys, table.encode(
+            ['approved', 'approved', 'rejected']
+        )) == []
+
+    def test_unknown_status_is_encoded(self, table):
+        assert table.encode(['approved', 'lost']) == [1, diffing.UNKNOWN]
+
+    def test_least_recently_seen_rows_are_evicted(self, table):
+        for number in range(4):
+            table.diff([('alice', number)], table.encode(['approved']))
+        table.diff([('alice', 0)], table.encode(['approved']))
+        table.diff([('alice', 4)], table.encode(['approved']))
+        assert len(table) == 4
+        assert ('alice', 0) in table.index
+        assert ('alice', 1) not in table.index
+
+    def test_matches_naive_diff(self, table):
+        table.maxsize = 100
+        keys = [('tenant', number) for number in range(50)]
+        before = [STATUSES[number % 3] for number in range(50)]
+        after = [STATUSES[number % 5 % 3] for number in range(50)]
+        previous = {}
+        diffing.naive_diff(previous, keys, before)
+        table.diff(keys, table.encode(before))
+        assert table.diff(keys, table.encode(after)) == diffing.naive_diff(
+            previous, keys, after
+        )
+
+    def test_batch_rows_are_not_evicted(self, table):
+        keys = [('alice', number) for number in range(6)]
+        codes = table.encode(STATUSES * 2)
+        assert table.diff(keys, codes) == list(range(6))
+        assert table.diff(keys, codes) == []
+
+    def test_limit_is_per_tenant(self, table):
+        table.diff([('bob', 'hw1')], table.encode(['approved']))
+        for number in range(10):
+            table.diff([('alice', number)], table.encode(['approved']))
+        assert ('bob', 'hw1') in table.index
+        assert len(table) == 5
+
+    def test_groups_match_flat_diff(self, table):
+        table.maxsize = 100
+        groups = [
+            ('alice', ['hw1', 'hw2', 'hw3'], table.encode(['approved'] * 3)),
+            ('bob', ['hw1', 'hw2'], table.encode(['approved'] * 2)),
+        ]
+        assert table.diff_groups(groups) == [0, 1, 2, 3, 4]
+        groups[1] = ('bob', ['hw1', 'hw2'], table.encode(
+            ['approved', 'rejected']
+        ))
+        assert table.diff_groups(groups) == [4]
+        assert table.diff([('bob', 'hw2')], table.encode(['rejected'])) == []
+
+    def test_evicted_rows_are_not_reused_from_cache(self, table):
+        names = ['hw1', 'hw2']
+        codes = table.encode(['approved', 'approved'])
+        table.diff_groups([('alice', names, codes)])
+        table.shrink(1.0)
+        table.diff([('bob', 'hw1'), ('bob', 'hw2')], table.encode(
+            ['rejected', 'rejected']
+        ))
+        assert table.diff_groups([('alice', names, codes)]) == [0, 1]
+        assert table.diff([('bob', 'hw1')], table.encode(['rejected'])) == []
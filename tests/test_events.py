@@ -0,0 +1,85 @@
+import json
+import threading
+
+import pytest
+
+import events
+
+
+class ListSink(events.Sink):
+    name = 'list'
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate = gate
+
+    def write(self, batch):
+        if self.gate:
+            self.gate.wait(5)
+        self.batches.append(batch)
+
+    @property
+    def events(self):
+        return [event for batch in self.batches for event in batch]
+
+
+class TestEvents:
+
+    def test_slow_sink_drops_oldest_without_blocking(self):
+        gate = threading.Event()
+        slow, fast = ListSink(gate), ListSink()
+        bus = events.EventBus()
+        slow_channel = bus.subscribe(slow, maxsize=3, batch=100, linger=10)
+        bus.subscribe(fast, batch=100, linger=0.01)
+        for number in range(10):
+            bus.publish(events.PollFailed(f't{number}', failures=1))
+        gate.set()
+        bus.close()
+        assert len(fast.events) == 10
+        assert [event.tenant for event in slow.events] == ['t7', 't8', 't9']
+        assert slow_channel.dropped == 7
+
+    def test_events_are_batched(self):
+        sink = ListSink()
+        bus = events.EventBus()
+        bus.subscribe(sink, batch=4, linger=10)
+        for number in range(8):
+            bus.publish(events.PollFailed('t', failures=number))
+        bus.close()
+        assert [len(batch) for batch in sink.batches] == [4, 4]
+
+    def test_sink_kinds_filter(self):
+        sink = events.TelegramSink(bot=None, chat_id=1)
+        assert sink.accepts(events.PollFailed('t'))
+        assert not sink.accepts(events.StatusChanged('t'))
+
+    def test_jsonl_sink(self, tmp_path):
+        path = tmp_path / 'events.jsonl'
+        bus = events.subscribe_configured(events.EventBus(), f'jsonl:{path}')
+        bus.publish(events.StatusChanged(
+            'alice', homework_name='hw1', status='approved', message='ok'
+        ))
+        bus.close()
+        record = json.loads(path.read_text(encoding='utf-8'))
+        assert record['kind'] == 'status_changed'
+        assert record['homework_name'] == 'hw1'
+
+    def test_unknown_sink(self):
+        with pytest.raises(ValueError):
+            events.make_sink('carrier-pigeon')
+
+    def test_worker_publishes_events(self, worker, practicum):
+        sink = ListSink()
+        worker.bus.subscribe(sink, linger=0.01)
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        practicum.fail('token-alice', 404)
+        worker.poll('alice', worker.clock())
+        practicum.fail('token-alice')
+        worker.poll('alice', worker.clock())
+        worker.bus.close()
+        kinds = [event.kind for event in sink.events]
+        assert kinds == [
+            'status_changed', 'poll_failed', 'endpoint_recovered'
+        ]
+        assert sink.events[0].message is not None
@@ -0,0 +1,49 @@
+import pytest
+
+import history
+
+
+def homework(status, date_updated, name='hw123'):
+    return {
+        'homework_name': name,
+        'status': status,
+        'date_updated': date_updated,
+        'reviewer_comment': '',
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = history.HistoryStore(str(tmp_path / 'history.sqlite3'))
+    yield store
+    store.close()
+
+
+class TestHistory:
+
+    def test_median_review_time(self, store):
+        store.observe('alice', homework('reviewing', '2020-02-13T10:00:00Z'))
+        store.observe('alice', homework('rejected', '2020-02-13T12:00:00Z'))
+        store.observe(
+            'alice', homework('reviewing', '2020-02-14T10:00:00Z', 'hw2')
+        )
+        store.observe(
+            'alice', homework('approved', '2020-02-14T11:00:00Z', 'hw2')
+        )
+        store.flush()
+        assert store.median_review_time('alice') == pytest.approx(3630)
+        assert store.median_review_time('bob') is None
+
+    def test_repeated_observation_is_stored_once(self, store):
+        for _ in range(3):
+            store.observe('alice', homework('rejected', '2020-02-13T12:00Z'))
+        assert store.flush() == 1
+        assert store.verdicts('alice') == {
+            'hw123': {'approved': 0, 'rejected': 1}
+        }
+
+    def test_stats_text(self, store):
+        store.observe('alice', homework('rejected', '2020-02-13T12:00:00Z'))
+        text = store.stats('alice')
+        assert 'нет данных' in text
+        assert 'hw123: возвратов 1' in text
@@ -0,0 +1,20 @@
+import diffing
+import memory
+
+
+class TestMemory:
+
+    def test_guard_shrinks_caches_over_budget(self, monkeypatch):
+        guard = memory.MemoryGuard(budget_mb=1)
+        monkeypatch.setattr(memory, 'guard', guard)
+        monkeypatch.setattr(memory, 'current_rss', lambda: 2 * 2 ** 20)
+        table = diffing.StatusTable(['approved'], maxsize=10)
+        for key in range(10):
+            table.diff([('alice', key)], table.encode(['approved']))
+        assert guard.check()
+        assert len(table) == 5
+        assert ('alice', 9) in table.index
+
+    def test_guard_within_budget(self):
+        guard = memory.MemoryGuard(budget_mb=0)
+        assert not guard.check()
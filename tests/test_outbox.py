@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+import exceptions
+import outbox
+
+HOMEWORK = {
+    'homework_name': 'hw123',
+    'status': 'approved',
+    'date_updated': '2020-02-13T14:40:57Z',
+}
+
+
+@pytest.fixture
+def box(tmp_path):
+    box = outbox.Outbox(str(tmp_path / 'outbox.sqlite3'))
+    yield box
+    box.close()
+
+
+class TestOutbox:
+
+    def test_duplicate_key_is_delivered_once(self, box):
+        key = outbox.make_key('default', HOMEWORK)
+        box.add(key, 1, 'text')
+        box.add(key, 1, 'text')
+        sent = []
+        box.deliver(lambda tenant, chat_id, text: sent.append(text) or 1)
+        assert sent == ['text']
+        box.add(key, 1, 'text')
+        box.deliver(lambda tenant, chat_id, text: sent.append(text) or 2)
+        assert sent == ['text']
+
+    def test_records_survive_reopen(self, tmp_path):
+        path = str(tmp_path / 'outbox.sqlite3')
+        box = outbox.Outbox(path)
+        box.add('key', 1, 'text')
+        box.close()
+        reopened = outbox.Outbox(path)
+        assert reopened.depth() == 1
+        reopened.close()
+
+    def test_failed_delivery_is_retried(self, box):
+        box.add('key', 1, 'text')
+
+        def broken(tenant, chat_id, text):
+            raise RuntimeError('Telegram is down')
+
+        assert box.deliver(broken) == 0
+        assert box.depth() == 1
+        assert box.deliver(lambda tenant, chat_id, text: 1) == 0
+        assert box.deliver(
+            lambda tenant, chat_id, text: 1,
+            now=time.time() + outbox.OUTBOX_BACKOFF,
+        ) == 1
+        assert box.depth() == 0
+
+    def test_retry_delay_grows(self, box):
+        box.add('key', 1, 'text')
+        delays = []
+        for _ in range(3):
+            now = time.time()
+            box.deliver(lambda *args: 1 / 0, now=now + 10 ** 6)
+            delays.append(box._db.execute(
+                'SELECT next_attempt_at FROM outbox'
+            ).fetchone()[0] - now)
+        assert delays[0] < delays[1] < delays[2]
+
+    def test_throttling_is_not_an_attempt(self, box):
+        box.add('key', 1, 'text')
+
+        def busy(tenant, chat_id, text):
+            raise exceptions.NoSenderAvailable('busy', retry_after=30)
+
+        for _ in range(box.max_attempts + 1):
+            box.deliver(busy, now=time.time() + 10 ** 6)
+        assert box.depth() == 1
+        assert box.pending(now=time.time() + 10) == []
+        assert len(box.pending(now=time.time() + 31)) == 1
+
+    def test_old_acked_rows_are_purged(self, box):
+        box.add('sent', 1, 'text')
+        box.add('unsent', 1, 'text')
+        box.deliver(lambda tenant, chat_id, text: 1 / 0)
+        box.ack(1, 10)
+        assert box.purge() == 0
+        retention = outbox.OUTBOX_RETENTION_DAYS * 24 * 3600
+        assert box.purge(now=time.time() + retention + 1) == 1
+        assert box.purge(now=time.time() + retention + 1) == 0
+        assert box.depth() == 1
+
+    def test_gives_up_after_max_attempts(self, tmp_path):
+        box = outbox.Outbox(str(tmp_path / 'box'), max_attempts=1)
+        box.add('key', 1, 'text')
+        box.deliver(lambda *args: 1 / 0)
+        assert box.depth() == 0
+        box.close()
+
+    def test_group_commit_writes_batch(self, box):
+        for number in range(10):
+            box.add(f'key{number}', 1, 'text')
+        assert box.flush() == 10
+        assert box.flush() == 0
+
+    def test_worker_writes_ahead_of_cursor(self, box, worker, practicum):
+        worker.box = box
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        assert box._db.execute('SELECT COUNT(*) FROM outbox').fetchone() == (
+            1,
+        )
@@ -0,0 +1,199 @@
+import gc
+import time
+
+import pytest
+import requests
+
+import senders
+import streaming
+import tenants
+import transport
+import utils
+import warmup
+
+ITERATIONS = 10000
+
+
+def count_calls(monkeypatch, module, name):
+    calls = []
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, wrapper)
+    return calls
+
+
+def make_worker(homework_module, practicum, telegram_fake, count, clock):
+    registry = tenants.TenantRegistry(
+        [
+            tenants.Tenant(
+                f'tenant{number}', f'token{number}', number, '1234:abcdefg',
+                transport=practicum,
+            )
+            for number in range(count)
+        ],
+        homework_module.ENDPOINT,
+        bot_factory=telegram_fake,
+    )
+    worker = homework_module.TenantWorker(registry, clock=clock)
+    worker.start()
+    return worker
+
+
+@pytest.fixture(autouse=True)
+def unlimited_bots(monkeypatch):
+    # Лимит Telegram ждёт по-настоящему и к проверяемым свойствам
+    # отношения не имеет.
+    monkeypatch.setattr(senders, 'BOT_RATE_LIMIT', 1e9)
+
+
+class VirtualClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPerformanceInvariants:
+
+    def test_polls_reuse_one_connection(self, homework_module,
+                                        keepalive_url):
+        registry = tenants.TenantRegistry(
+            [tenants.Tenant('alice', 'token', 1, '1234:abcdefg',
+                            endpoint=keepalive_url)],
+            homework_module.ENDPOINT,
+        )
+        worker = homework_module.TenantWorker(registry)
+        worker.plan.add('alice', 0)
+        for _ in range(20):
+            worker.poll('alice', 0)
+        stats = warmup.connection_stats(worker.transport.session)
+        assert stats['requests'] == 20
+        assert stats['connections'] == 1
+
+    def test_streamed_polls_reuse_one_connection(
+            self, monkeypatch, homework_module, keepalive_url):
+        monkeypatch.setattr(streaming, 'STREAM_RESPONSES', True)
+        monkeypatch.setattr(homework_module, 'FETCH_WORKERS', 8)
+        registry = tenants.TenantRegistry(
+            [tenants.Tenant(f'user{number}', 'token', number,
+                            '1234:abcdefg', endpoint=keepalive_url)
+             for number in range(10)],
+            homework_module.ENDPOINT,
+        )
+        worker = homework_module.TenantWorker(registry)
+        names = list(registry.tenants)
+        for name in names:
+            worker.plan.add(name, 0)
+        for _ in range(3):
+            worker.poll_batch(names, 0)
+        stats = warmup.connection_stats(worker.transport.session)
+        assert stats['requests'] == 30
+        assert stats['connections'] == 1
+
+    def test_main_does_not_repeat_unchanged_status(
+            self, monkeypatch, random_timestamp, homework_module):
+        data = {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': random_timestamp,
+        }
+
+        def mock_response_get(*args, **kwargs):
+            response = utils.MockResponseGET(
+                random_timestamp=random_timestamp
+            )
+            response.json = lambda: data
+            return response
+
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 5:
+                raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(time, 'sleep', sleep)
+        monkeypatch.setattr(homework_module.telegram, 'Bot',
+                            utils.MockTelegramBot)
+        sent = []
+        monkeypatch.setattr(homework_module, 'send_message',
+                            lambda bot, message: sent.append(message))
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+        assert len(sent) == 1
+
+    def test_worker_does_not_repeat_unchanged_status(self, worker,
+                                                     practicum,
+                                                     telegram_fake):
+        practicum.set_status('token-alice', 'hw1', 'approved')
+        for _ in range(10):
+            worker.poll('alice', worker.clock())
+        assert len(telegram_fake.messages) == 1
+
+    def test_each_tenant_is_polled_at_most_once_per_tick(
+            self, homework_module, practicum, telegram_fake):
+        clock = VirtualClock()
+        worker = make_worker(homework_module, practicum, telegram_fake, 50,
+                             clock)
+        calls = practicum.calls
+        worker.tick()
+        assert practicum.calls - calls == 50
+        worker.tick()
+        assert practicum.calls - calls == 50
+        clock.now += homework_module.RETRY_PERIOD * 100
+        worker.tick()
+        assert practicum.calls - calls == 100
+
+    def test_rendering_is_proportional_to_changes(
+            self, monkeypatch, homework_module, practicum, telegram_fake):
+        clock = VirtualClock()
+        for number in range(100):
+            for project in range(10):
+                practicum.set_status(f'token{number}', f'hw{project}',
+                                     'reviewing')
+        worker = make_worker(homework_module, practicum, telegram_fake, 100,
+                             clock)
+        worker.states = {
+            name: {'timestamp': 0} for name in worker.registry.tenants
+        }
+        worker.tick()
+        calls = practicum.calls
+        renders = count_calls(monkeypatch, homework_module, 'parse_status')
+        for number in range(5):
+            practicum.set_status(f'token{number}', 'hw0', 'approved')
+        for state in worker.states.values():
+            state['timestamp'] = 0
+        clock.now += homework_module.RETRY_PERIOD * 100
+        worker.tick()
+        assert practicum.calls - calls == 100
+        assert len(renders) == 5
+
+    def test_no_retained_growth_over_iterations(self, homework_module):
+        practicum = transport.FakePracticum()
+        telegram_fake = transport.FakeTelegram(keep=10)
+        clock = VirtualClock()
+        worker = make_worker(homework_module, practicum, telegram_fake, 10,
+                             clock)
+        names = list(worker.registry.tenants)
+        tokens = [f'token{number}' for number in range(10)]
+        statuses = list(homework_module.HOMEWORK_VERDICTS)
+
+        def run(iterations):
+            for iteration in range(iterations):
+                if iteration % 10 == 0:
+                    practicum.set_status(
+                        tokens[iteration % 7], 'hw1',
+                        statuses[iteration % 3],
+                    )
+                worker.poll(names[iteration % 10], clock())
+            gc.collect()
+            return len(gc.get_objects())
+
+        baseline = run(ITERATIONS // 10)
+        assert run(ITERATIONS) - baseline < 100
@@ -0,0 +1,57 @@
+class TestPipeline:
+
+    def test_status_change_is_notified_once(self, worker, practicum,
+                                            telegram_fake):
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        worker.poll('alice', worker.clock())
+        texts = [message.text for message in telegram_fake.messages]
+        assert len(texts) == 1
+        assert 'hw1' in texts[0]
+        assert telegram_fake.messages[0].chat_id == 0
+
+    def test_every_changed_homework_is_notified(self, worker, practicum,
+                                                telegram_fake):
+        practicum.set_status('token-bob', 'hw1', 'approved')
+        practicum.set_status('token-bob', 'hw2', 'reviewing')
+        worker.tick()
+        assert sorted(
+            message.chat_id for message in telegram_fake.messages
+        ) == [1, 1]
+
+    def test_unauthorized_tenant_is_quarantined(self, worker, practicum):
+        practicum.fail('token-alice', 401)
+        worker.tick()
+        assert 'alice' in worker.registry.quarantined
+        calls = practicum.calls
+        worker.tick()
+        assert practicum.calls == calls
+
+    def test_once_persists_cursor(self, homework_module, registry,
+                                  practicum, telegram_fake, tmp_path):
+        path = str(tmp_path / 'cursor.json')
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        assert homework_module.TenantWorker(registry).once(path) == 0
+        assert len(telegram_fake.messages) == 1
+        homework_module.TenantWorker(registry).once(path)
+        assert len(telegram_fake.messages) == 1
+        practicum.set_status('token-alice', 'hw1', 'approved')
+        homework_module.TenantWorker(registry).once(path)
+        assert len(telegram_fake.messages) == 2
+
+    def test_once_reports_failures(self, homework_module, registry,
+                                   practicum, tmp_path):
+        practicum.fail('token-bob', 404)
+        worker = homework_module.TenantWorker(registry)
+        assert worker.once(str(tmp_path / 'cursor.json')) == 1
+
+    def test_once_keeps_quarantine(self, homework_module, registry,
+                                   practicum, tmp_path):
+        path = str(tmp_path / 'cursor.json')
+        practicum.fail('token-alice', 401)
+        homework_module.TenantWorker(registry).once(path)
+        registry.quarantined.clear()
+        calls = practicum.calls
+        assert homework_module.TenantWorker(registry).once(path) == 0
+        assert practicum.calls - calls == 1
+        assert 'alice' in registry.quarantined
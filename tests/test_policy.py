@@ -0,0 +1,61 @@
+import pytest
+import requests
+import telegram
+
+import exceptions
+import homework
+import policy
+
+
+class TestPolicy:
+
+    @pytest.mark.parametrize('error, expected', [
+        (exceptions.EndpointStatusError('', 401), policy.UNAUTHORIZED),
+        (exceptions.EndpointStatusError('', 429), policy.THROTTLED),
+        (exceptions.EndpointStatusError('', 503), policy.SERVER_ERROR),
+        (exceptions.EndpointStatusError('', 404), policy.UNKNOWN),
+        (exceptions.EndpointNotAnswer('timeout'), policy.UNAVAILABLE),
+        (requests.Timeout(), policy.UNAVAILABLE),
+        (telegram.error.BadRequest('Chat not found'), policy.REJECTED),
+        (telegram.error.TimedOut(), policy.UNCONFIRMED),
+        (telegram.error.NetworkError('reset'), policy.UNAVAILABLE),
+        (exceptions.StatusError(), policy.BAD_RESPONSE),
+    ])
+    def test_classify(self, error, expected):
+        assert policy.classify(error) is expected
+
+    def test_transient_error_is_retried(self):
+        calls = []
+        pauses = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise exceptions.EndpointNotAnswer('timeout')
+            return 'ok'
+
+        assert policy.call(flaky, sleep=pauses.append) == 'ok'
+        assert pauses == [1, 2]
+
+    def test_permanent_error_is_not_retried(self):
+        calls = []
+
+        def unauthorized():
+            calls.append(1)
+            raise exceptions.EndpointStatusError('', 401)
+
+        with pytest.raises(exceptions.EndpointStatusError):
+            policy.call(unauthorized, sleep=lambda delay: None)
+        assert len(calls) == 1
+
+    def test_send_timeout_is_not_repeated(self, monkeypatch):
+        calls = []
+
+        class SlowBot:
+            def send_message(self, chat_id, text):
+                calls.append(text)
+                raise telegram.error.TimedOut()
+
+        monkeypatch.setattr(homework.time, 'sleep', lambda delay: None)
+        homework.send_message(SlowBot(), 'hello')
+        assert calls == ['hello']
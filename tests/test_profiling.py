@@ -0,0 +1,89 @@
+import signal
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = profiling.SpanRecorder(enabled=True)
+    monkeypatch.setattr(profiling, 'recorder', recorder)
+    return recorder
+
+
+class TestProfiling:
+
+    def test_disabled_recorder_records_nothing(self, recorder):
+        recorder.enabled = False
+
+        @profiling.timed()
+        def work():
+            return 42
+
+        assert work() == 42
+        with profiling.span('stage'):
+            pass
+        assert recorder.summary() == {}
+
+    def test_enabled_recorder_records_spans(self, recorder):
+
+        @profiling.timed('work')
+        def work():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            work()
+        with profiling.span('stage'):
+            pass
+        with profiling.span('stage'):
+            pass
+        summary = recorder.summary()
+        assert summary['work']['count'] == 1
+        assert summary['stage']['count'] == 2
+        assert summary['stage']['max'] >= summary['stage']['avg'] >= 0
+
+    def test_worker_fetch_and_send_are_timed(self, recorder, worker,
+                                             practicum):
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        summary = recorder.summary()
+        assert summary['fetch_homeworks']['count'] == 2
+        assert summary['send_message']['count'] == 1
+
+    def test_dump_writes_collapsed_stacks(self, recorder, tmp_path):
+        recorder.record('stage', 0.5)
+        profiler = profiling.SamplingProfiler(
+            seconds=0.05, interval=0.001, directory=str(tmp_path)
+        )
+        profiler.start()
+        profiler.join()
+        with open(profiler.path, encoding='UTF-8') as file:
+            lines = file.read().splitlines()
+        stacks = [line for line in lines if not line.startswith('#')]
+        assert stacks
+        for line in stacks:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+            assert all(frame.endswith(')') for frame in stack.split(';'))
+        assert '# span stage count=1 avg=0.500000 max=0.500000' in lines
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'),
+                        reason='нет SIGUSR1')
+    def test_signal_is_ignored_while_profiling(self, monkeypatch):
+        started = []
+
+        class Running:
+            def is_alive(self):
+                return True
+
+        monkeypatch.setattr(profiling, 'start_profiling',
+                            lambda: started.append(1) or Running())
+        previous = signal.getsignal(signal.SIGUSR1)
+        try:
+            profiling.install_profile_signal()
+            signal.raise_signal(signal.SIGUSR1)
+            signal.raise_signal(signal.SIGUSR1)
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+        assert started == [1]
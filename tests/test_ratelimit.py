@@ -0,0 +1,83 @@
+import time
+
+import policy
+import ratelimit
+import tenants
+import transport
+
+
+class TestTokenBucket:
+
+    def test_burst_then_wait(self):
+        bucket = ratelimit.TokenBucket(rate=1, capacity=2)
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert 0 < bucket.try_acquire() <= 1
+
+    def test_drain(self):
+        bucket = ratelimit.TokenBucket(rate=1, capacity=5)
+        bucket.drain()
+        assert bucket.try_acquire() > 0
+
+    def test_state_shared_through_file(self, tmp_path):
+        path = str(tmp_path / 'bucket')
+        first = ratelimit.TokenBucket(rate=0.01, capacity=1, path=path)
+        second = ratelimit.TokenBucket(rate=0.01, capacity=1, path=path)
+        assert first.try_acquire() == 0
+        if ratelimit.fcntl:
+            assert second.try_acquire() > 0
+
+    def test_waits_are_counted(self, monkeypatch):
+        monkeypatch.setattr(ratelimit.time, 'sleep', lambda seconds: None)
+        bucket = ratelimit.TokenBucket(rate=10, capacity=1)
+        bucket.acquire()
+        bucket.acquire()
+        stats = bucket.stats()
+        assert stats['waits'] == 1
+        assert 0 < stats['waited'] == stats['max_wait'] <= 0.1
+
+    def test_worker_reports_waits(self, monkeypatch, worker):
+        bucket = ratelimit.TokenBucket(rate=1, capacity=1)
+        monkeypatch.setattr(ratelimit, 'limiter', bucket)
+        worker.plan.add('alice', worker.clock())
+        worker.plan.add('bob', worker.clock())
+        worker.tick()
+        assert worker.describe()['rate_limit']['waits'] == 1
+
+    def test_worker_retries_take_tokens(self, monkeypatch, worker,
+                                        practicum):
+        bucket = ratelimit.TokenBucket(rate=1e6, capacity=1e6)
+        acquired = []
+        monkeypatch.setattr(bucket, 'acquire',
+                            lambda tokens=1: acquired.append(tokens) or 0)
+        monkeypatch.setattr(ratelimit, 'limiter', bucket)
+        monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+        practicum.fail('token-alice', 503)
+        calls = practicum.calls
+        worker.tick()
+        assert practicum.calls - calls == 2 + policy.SERVER_ERROR.retries
+        assert len(acquired) == practicum.calls - calls
+
+    def test_single_pass_takes_tokens(self, monkeypatch, worker, practicum,
+                                      tmp_path):
+        bucket = ratelimit.TokenBucket(rate=1e6, capacity=1e6)
+        acquired = []
+        monkeypatch.setattr(bucket, 'acquire',
+                            lambda tokens=1: acquired.append(tokens) or 0)
+        monkeypatch.setattr(ratelimit, 'limiter', bucket)
+        calls = practicum.calls
+        worker.once(str(tmp_path / 'cursor.json'))
+        assert practicum.calls - calls == len(acquired) == 2
+
+    def test_token_check_takes_token(self, monkeypatch):
+        bucket = ratelimit.TokenBucket(rate=1, capacity=1)
+        monkeypatch.setattr(ratelimit, 'limiter', bucket)
+        tenant = tenants.Tenant('alice', 'token-a', 1, 'bot')
+        tenants.check_practicum_token(
+            tenant, 'https://example.com/',
+            transport.FakePracticum(),
+        )
+        assert bucket.try_acquire() > 0
+
+    def test_worker_requests_have_timeout(self, worker):
+        assert worker.transport.timeout == transport.API_TIMEOUT
@@ -0,0 +1,47 @@
+import scheduler
+
+
+class TestScheduler:
+
+    def make_plan(self, names, budget=None):
+        plan = scheduler.Scheduler(600, budget=budget, min_interval=1)
+        for name in names:
+            plan.add(name, now=0)
+        return plan
+
+    def test_reviewing_is_polled_more_often(self):
+        plan = self.make_plan(['busy', 'idle'])
+        plan.pop_due(now=0)
+        busy = plan.record('busy', 'reviewing', changed=True, now=0)
+        idle = plan.record('idle', None, now=0)
+        assert busy < idle
+        assert plan.pop_due(now=busy) == ['busy']
+
+    def test_due_tenants_ordered_by_priority(self):
+        plan = self.make_plan(['done', 'busy'])
+        plan.pop_due(now=0)
+        plan.record('done', 'approved', now=0)
+        plan.record('busy', 'reviewing', now=0)
+        plan.add('done', now=10)
+        plan.add('busy', now=10)
+        assert plan.pop_due(now=10) == ['busy', 'done']
+
+    def test_errors_back_off(self):
+        plan = self.make_plan(['broken'])
+        plan.pop_due(now=0)
+        first = plan.record('broken', failed=True, now=0)
+        second = plan.record('broken', failed=True, now=0)
+        assert second == first * 2
+
+    def test_budget_stretches_intervals(self):
+        names = [f'tenant{i}' for i in range(10)]
+        plan = self.make_plan(names, budget=10)
+        plan.pop_due(now=0)
+        delays = [plan.record(name, 'reviewing', now=0) for name in names]
+        assert 1 / delays[-1] * len(names) <= 10 / 600 + 1e-9
+
+    def test_removed_tenant_is_not_due(self):
+        plan = self.make_plan(['gone'])
+        plan.remove('gone')
+        assert plan.pop_due(now=0) == []
+        assert plan.next_delay(now=0) == 600
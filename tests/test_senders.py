@@ -0,0 +1,136 @@
+import time
+
+import pytest
+import telegram
+
+import exceptions
+import policy
+import senders
+
+
+class FakeBot:
+    def __init__(self, token):
+        self.token = token
+        self.sent = []
+        self.error = None
+
+    def send_message(self, chat_id=None, text=None):
+        if self.error:
+            raise self.error
+        self.sent.append((chat_id, text))
+
+
+def make_pool(count=3):
+    return senders.SenderPool(
+        [f'{number}:token' for number in range(count)], factory=FakeBot
+    )
+
+
+class TestSenderPool:
+
+    def test_chat_is_pinned_to_one_bot(self):
+        pool = make_pool()
+        for _ in range(5):
+            pool.send(42, 'text')
+        used = [sender for sender in pool.senders if sender.bot.sent]
+        assert len(used) == 1
+        assert len(used[0].bot.sent) == 5
+
+    def test_chats_are_spread_over_bots(self):
+        pool = make_pool()
+        for chat_id in range(100):
+            pool.send(chat_id, 'text')
+        assert all(sender.sent > 10 for sender in pool.senders)
+
+    def test_failover_disables_broken_bot(self):
+        pool = make_pool()
+        first = pool.candidates(42)[0]
+        first.bot.error = telegram.error.NetworkError('down')
+        pool.send(42, 'text')
+        assert not first.available
+        assert sum(sender.sent for sender in pool.senders) == 1
+
+    def test_chat_error_keeps_bot_available(self):
+        pool = make_pool()
+        first = pool.candidates(42)[0]
+        first.bot.error = telegram.error.BadRequest('Chat not found')
+        pool.send(42, 'text')
+        assert first.available
+
+    def test_preferred_bot_goes_first(self):
+        pool = make_pool()
+        assert pool.candidates(42, preferred='2:token')[0].token == '2:token'
+
+    def test_last_bot_is_not_disabled(self):
+        pool = make_pool(1)
+        sender = pool.senders[0]
+        sender.bot.error = telegram.error.NetworkError('down')
+        with pytest.raises(telegram.error.NetworkError):
+            pool.send(42, 'text')
+        assert sender.available
+        sender.bot.error = None
+        pool.send(42, 'text')
+        assert sender.bot.sent == [(42, 'text')]
+
+    def test_timeout_is_not_sent_twice(self):
+        pool = make_pool()
+        pool.candidates(42)[0].bot.error = telegram.error.TimedOut()
+        with pytest.raises(exceptions.MessageMaybeSent):
+            pool.send(42, 'text')
+        assert sum(sender.sent for sender in pool.senders) == 0
+        assert all(sender.available for sender in pool.senders)
+
+    def test_no_bot_available_is_retryable(self):
+        pool = make_pool(2)
+        for sender in pool.senders:
+            sender.bot.error = telegram.error.RetryAfter(30)
+        with pytest.raises(exceptions.NoSenderAvailable) as error:
+            pool.send(42, 'text')
+        assert 0 < error.value.retry_after <= 30
+        assert policy.classify(error.value).requeue
+
+    def test_worker_requeues_when_no_bot_available(self, worker, practicum,
+                                                   telegram_fake):
+        for sender in worker.pool.senders:
+            sender.down_until = time.monotonic() + 30
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        assert telegram_fake.messages == []
+        assert len(worker.states['alice']['deferred']) == 1
+        for sender in worker.pool.senders:
+            sender.down_until = 0
+        worker.release_deferred(time.time() + 60)
+        assert len(telegram_fake.messages) == 1
+
+    def test_private_bots_are_not_hashed(self):
+        pool = senders.SenderPool(
+            ['0:token', '1:token'], factory=FakeBot, private=['9:private']
+        )
+        for chat_id in range(50):
+            pool.send(chat_id, 'text')
+        assert [sender.token for sender in pool.candidates(7)] == [
+            sender.token for sender in pool.candidates(7, preferred='x')
+        ]
+        assert '9:private' not in {sender.token for sender in pool.senders}
+        pool.send(7, 'text', preferred='9:private')
+        assert pool.stats()['9']['sent'] == 1
+
+    @pytest.mark.parametrize('error', [
+        telegram.error.InvalidToken(),
+        telegram.error.Unauthorized('Unauthorized'),
+    ])
+    def test_revoked_token_disables_bot(self, error):
+        pool = make_pool()
+        first = pool.candidates(42)[0]
+        first.bot.error = error
+        pool.send(42, 'text')
+        assert not first.available
+
+    def test_blocked_chat_keeps_bot_available(self):
+        pool = make_pool()
+        first = pool.candidates(42)[0]
+        first.bot.error = telegram.error.Unauthorized(
+            'Forbidden: bot was blocked by the user'
+        )
+        pool.send(42, 'text')
+        assert first.available
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+import requests
+
+import streaming
+import transport
+
+RESPONSE = {
+    'homeworks': [
+        {'homework_name': 'hw1', 'status': 'approved',
+         'reviewer_comment': 'Всё нравится'},
+        {'homework_name': 'hw2', 'status': 'rejected'},
+    ],
+    'current_date': 1581604970,
+}
+
+
+def chunked(data, size):
+    raw = json.dumps(data, ensure_ascii=False).encode()
+    return [raw[start:start + size] for start in range(0, len(raw), size)]
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 3, 7, 1024])
+    def test_matches_json_loads(self, size):
+        stream = streaming.HomeworkStream(chunked(RESPONSE, size))
+        assert list(stream) == RESPONSE['homeworks']
+        assert stream.fields == {'current_date': 1581604970}
+
+    def test_yields_before_body_is_complete(self):
+        received = []
+
+        def chunks():
+            yield b'{"homeworks": [{"homework_name": "hw1"}, '
+            received.append('second chunk')
+            yield b'{"homework_name": "hw2"}]}'
+
+        stream = iter(streaming.HomeworkStream(chunks()))
+        assert next(stream) == {'homework_name': 'hw1'}
+        assert received == []
+
+    def test_buffer_stays_small(self):
+        data = {'homeworks': [{'homework_name': f'hw{number}'}
+                              for number in range(10000)]}
+        stream = streaming.HomeworkStream(chunked(data, 512))
+        longest = 0
+        for _ in stream:
+            longest = max(longest, len(stream._buffer))
+        assert stream.count == 10000
+        assert longest < 1024
+
+    def test_empty_list(self):
+        stream = streaming.HomeworkStream([b'{"current_date": 1, ',
+                                           b'"homeworks": []}'])
+        assert list(stream) == []
+        assert stream.fields == {'current_date': 1}
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[{"homeworks": []}]', TypeError),
+        (b'{"homeworks": {"homework_name": "hw"}}', TypeError),
+        (b'{"current_date": 1}', KeyError),
+        (b'{"homeworks": [{"homework_name": ', ValueError),
+    ])
+    def test_invalid_responses(self, body, error):
+        with pytest.raises(error):
+            list(streaming.HomeworkStream([body]))
+
+    def test_worker_notifies_before_body_is_complete(
+            self, monkeypatch, worker, telegram_fake):
+
+        class BrokenResponse(transport.FakeResponse):
+            def iter_content(self, chunk_size=1):
+                raw = chunked(RESPONSE, 10 ** 6)[0]
+                yield raw[:raw.index(b'}') + 2]
+                raise requests.ConnectionError('connection reset')
+
+        class Client:
+            def get(self, url, **kwargs):
+                return BrokenResponse(200, RESPONSE)
+
+        monkeypatch.setattr(streaming, 'STREAM_RESPONSES', True)
+        worker.registry.tenants['alice'].transport = Client()
+        worker.poll('alice', worker.clock())
+        assert len(telegram_fake.messages) == 1
+        assert 'hw1' in telegram_fake.messages[0].text
+        assert worker.plan.stats['alice'].errors == 1
+
+    def test_worker_stream_is_not_notified_twice(
+            self, monkeypatch, worker, practicum, telegram_fake):
+        monkeypatch.setattr(streaming, 'STREAM_RESPONSES', True)
+        practicum.set_status('token-bob', 'hw1', 'approved')
+        practicum.set_status('token-bob', 'hw2', 'reviewing')
+        worker.tick()
+        worker.poll('bob', worker.clock())
+        assert len(telegram_fake.messages) == 2
+        assert worker.states['bob']['timestamp'] == practicum.now
@@ -0,0 +1,102 @@
+import datetime
+import time
+
+import pytest
+
+import outbox
+import subscriptions
+
+UTC = datetime.timezone.utc
+
+
+def timestamp(hour, minute=0):
+    return datetime.datetime(2024, 1, 1, hour, minute, tzinfo=UTC).timestamp()
+
+
+class TestSubscriptions:
+
+    def test_empty_subscription_wants_everything(self):
+        subscription = subscriptions.Subscription()
+        assert subscription.match is None
+        assert subscription.wants({'homework_name': 'x', 'status': 'y'})
+
+    def test_statuses_and_projects_are_combined(self):
+        subscription = subscriptions.Subscription(
+            statuses=['approved', 'rejected'], projects=['sprint_1*', 'bot']
+        )
+        assert subscription.wants(
+            {'homework_name': 'sprint_1_api', 'status': 'approved'}
+        )
+        assert not subscription.wants(
+            {'homework_name': 'sprint_1_api', 'status': 'reviewing'}
+        )
+        assert not subscription.wants(
+            {'homework_name': 'sprint_2', 'status': 'approved'}
+        )
+
+    def test_quiet_hours_across_midnight(self):
+        subscription = subscriptions.Subscription(
+            quiet_hours='23:00-08:00', timezone='UTC'
+        )
+        assert subscription.quiet_until(timestamp(12)) is None
+        assert subscription.quiet_until(timestamp(2)) == timestamp(8)
+        assert subscription.quiet_until(timestamp(23, 30)) == (
+            timestamp(8) + 24 * 3600
+        )
+
+    def test_bad_quiet_hours(self):
+        with pytest.raises(ValueError):
+            subscriptions.Subscription(quiet_hours='25:00-08:00')
+
+    def test_filtered_change_is_not_sent(self, worker, practicum,
+                                         telegram_fake):
+        worker.registry.tenants['alice'].subscription = (
+            subscriptions.Subscription(statuses=['approved'])
+        )
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        assert telegram_fake.messages == []
+        practicum.set_status('token-alice', 'hw1', 'approved')
+        worker.poll('alice', worker.clock())
+        assert len(telegram_fake.messages) == 1
+
+    def test_quiet_hours_defer_delivery(self, worker, practicum,
+                                        telegram_fake, monkeypatch):
+        subscription = subscriptions.Subscription()
+        monkeypatch.setattr(subscription, 'quiet_until', lambda now: now + 60)
+        worker.registry.tenants['alice'].subscription = subscription
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        assert telegram_fake.messages == []
+        worker.release_deferred(worker.states['alice']['deferred'][0][0])
+        assert len(telegram_fake.messages) == 1
+        assert worker.states['alice']['deferred'] == []
+
+    def test_quiet_hours_defer_into_outbox(self, worker, practicum,
+                                           telegram_fake, monkeypatch,
+                                           tmp_path):
+        path = str(tmp_path / 'outbox.sqlite3')
+        worker.box = outbox.Outbox(path)
+        release = time.time() + 3600
+        subscription = subscriptions.Subscription()
+        monkeypatch.setattr(subscription, 'quiet_until', lambda now: release)
+        worker.registry.tenants['alice'].subscription = subscription
+        practicum.set_status('token-alice', 'hw1', 'reviewing')
+        worker.tick()
+        worker.box.close()
+        assert 'deferred' not in worker.states['alice']
+        reopened = outbox.Outbox(path)
+        assert reopened.pending() == []
+        assert len(reopened.pending(now=release)) == 1
+        reopened.close()
+
+    def test_deferred_in_memory_are_bounded(self, homework_module, worker,
+                                            monkeypatch):
+        monkeypatch.setattr(homework_module, 'DEFERRED_LIMIT', 2)
+        tenant = worker.registry.tenants['alice']
+        worker.states['alice'] = {'timestamp': 0}
+        for number in range(3):
+            worker.defer(tenant, f'key{number}', f'text{number}', 0)
+        assert [
+            entry[2] for entry in worker.states['alice']['deferred']
+        ] == ['text1', 'text2']
@@ -0,0 +1,83 @@
+import json
+
+import tenants
+
+
+def make_registry(monkeypatch, bad_tokens=()):
+    calls = []
+
+    def fake_check(self, key, tenant):
+        calls.append(key)
+        return tenants.INVALID if key[1] in bad_tokens else tenants.VALID
+
+    monkeypatch.setattr(tenants.TenantRegistry, '_check', fake_check)
+    registry = tenants.TenantRegistry(
+        [
+            tenants.Tenant('alice', 'token-a', 1, 'bot'),
+            tenants.Tenant('bob', 'token-b', 2, 'bot'),
+        ],
+        'https://example.com/',
+    )
+    return registry, calls
+
+
+class TestTenants:
+
+    def test_load_tenants_from_env(self):
+        result = tenants.load_tenants('token', '123', 'bot')
+        assert [tenant.name for tenant in result] == ['default']
+        assert result[0].headers == {'Authorization': 'OAuth token'}
+
+    def test_load_tenants_from_file(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': 'alice', 'practicum_token': 'a', 'chat_id': 1},
+            {'name': 'bob', 'practicum_token': 'b', 'chat_id': 2,
+             'telegram_token': 'other'},
+        ]))
+        result = tenants.load_tenants(None, None, 'bot', path=str(path))
+        assert [tenant.telegram_token for tenant in result] == [
+            'bot', 'other'
+        ]
+
+    def test_validate_checks_each_token_once(self, monkeypatch):
+        registry, calls = make_registry(monkeypatch)
+        assert registry.validate() == []
+        assert len(calls) == 3
+        registry.validate()
+        assert len(calls) == 3
+
+    def test_invalid_tenant_is_quarantined(self, monkeypatch):
+        registry, calls = make_registry(monkeypatch, bad_tokens={'token-b'})
+        assert registry.validate() == ['bob']
+        assert [tenant.name for tenant in registry.active()] == ['alice']
+
+    def test_quarantine_is_rechecked(self, monkeypatch):
+        registry, calls = make_registry(monkeypatch, bad_tokens={'token-b'})
+        registry.quarantine_period = 0
+        registry.validate()
+        monkeypatch.setattr(
+            tenants.TenantRegistry, '_check',
+            lambda self, key, tenant: tenants.VALID
+        )
+        assert registry.recheck_quarantined() == ['bob']
+        assert len(registry.active()) == 2
+
+    def test_ttl_cache_expires(self):
+        cache = tenants.TTLCache(ttl=0)
+        cache.set('key', 'value')
+        assert cache.get('key') is None
+
+    def test_token_check_has_timeout(self):
+        calls = []
+
+        class Client:
+            def get(self, url, **kwargs):
+                calls.append(kwargs)
+                raise TimeoutError('stalled')
+
+        tenant = tenants.Tenant('alice', 'token-a', 1, 'bot')
+        assert tenants.check_practicum_token(
+            tenant, 'https://example.com/', Client()
+        ) == tenants.UNKNOWN
+        assert calls[0]['timeout'] == tenants.VALIDATION_TIMEOUT
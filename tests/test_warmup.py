@@ -0,0 +1,60 @@
+import socket
+
+import pytest
+
+import ratelimit
+import transport
+import warmup
+
+
+class TestWarmup:
+
+    def test_dns_cache_respects_ttl(self):
+        calls = []
+
+        def resolve(*args):
+            calls.append(args)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '',
+                     ('127.0.0.1', args[1]))]
+
+        cache = warmup.DnsCache(ttl=60, resolve=resolve)
+        cache.getaddrinfo('example.com', 443)
+        cache.getaddrinfo('example.com', 443)
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.refresh(horizon=120) == 1
+        assert len(calls) == 2
+
+    def test_session_reuses_connection(self, keepalive_url):
+        session = transport.make_session(2)
+        client = transport.HttpTransport(session)
+        for _ in range(5):
+            client.get(keepalive_url).close()
+        stats = warmup.connection_stats(session)
+        assert stats['requests'] == 5
+        assert stats['connections'] == 1
+        assert stats['reuse'] == pytest.approx(0.8)
+
+    def test_warm_opens_pooled_connection(self, keepalive_url):
+        session = transport.make_session(2)
+        warmer = warmup.Warmer(session, {keepalive_url: None})
+        warmer.warm()
+        session.get(keepalive_url).close()
+        assert warmer.stats()['connections'] == 1
+
+    def test_warm_uses_auth_and_rate_limit(self, monkeypatch):
+        calls = []
+
+        class Session:
+            def head(self, url, **kwargs):
+                calls.append((url, kwargs['headers']))
+                return transport.FakeResponse(200, {})
+
+        bucket = ratelimit.TokenBucket(rate=0.01, capacity=1)
+        monkeypatch.setattr(ratelimit, 'limiter', bucket)
+        headers = {'Authorization': 'OAuth token'}
+        warmer = warmup.Warmer(Session(), {'https://example.com/': headers})
+        warmer.warm()
+        warmer.warm()
+        assert calls == [('https://example.com/', headers)]
+        assert warmer.skipped == 1
@@ -0,0 +1,203 @@
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+
+import requests
+
+# Таймаут запросов обработчика опроса: без него зависшее соединение
+# навсегда занимает поток опроса.
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 30))
+
+
+class HttpTransport:
+    """HTTP-клиент для API Практикума на основе requests."""
+
+    def __init__(self, session=None, timeout=None):
+        self.session = session
+        self.timeout = timeout
+
+    def get(self, url, headers=None, params=None, stream=False,
+            timeout=None):
+        """Выполняет GET-запрос и возвращает ответ requests.
+
+        timeout, если задан, заменяет таймаут транспорта.
+        """
+        kwargs = {'headers': headers, 'params': params, 'stream': stream}
+        timeout = timeout or self.timeout
+        if timeout:
+            kwargs['timeout'] = timeout
+        if self.session is not None:
+            return self.session.get(url, **kwargs)
+        return requests.get(url, **kwargs)
+
+
+def make_session(pool_size=10):
+    """Сессия requests с пулом соединений на pool_size потоков."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class FakeResponse:
+    """Ответ, полностью находящийся в памяти."""
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.reason = HTTPStatus(status_code).phrase
+        self._data = data
+        self.text = json.dumps(data, ensure_ascii=False)
+
+    def json(self):
+        """Возвращает тело ответа."""
+        return self._data
+
+    def iter_content(self, chunk_size=1):
+        """Отдаёт тело ответа кусками, как requests при stream=True."""
+        raw = self.text.encode()
+        for start in range(0, len(raw), chunk_size):
+            yield raw[start:start + chunk_size]
+
+    def close(self):
+        """Ничего не делает: соединения нет."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class FakePracticum:
+    """Заглушка API Практикума для тестов и бенчмарков.
+
+    Хранит работы по токенам и отвечает на запросы без сети. Ответы
+    с ошибкой задаются через fail(token, status_code), latency
+    имитирует задержку сети на каждый запрос.
+    """
+
+    def __init__(self, now=None, latency=0):
+        self.now = int(time.time()) if now is None else now
+        self.latency = latency
+        self.homeworks = {}
+        self.errors = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def set_status(self, token, homework_name, status, **fields):
+        """Меняет статус работы пользователя с токеном token."""
+        with self._lock:
+            self.now += 1
+            works = self.homeworks.setdefault(token, {})
+            works[homework_name] = dict(
+                fields,
+                homework_name=homework_name,
+                status=status,
+                updated=self.now,
+            )
+
+    def fail(self, token, status_code=None):
+        """Задаёт код ошибки для токена; None снимает ошибку."""
+        if status_code is None:
+            self.errors.pop(token, None)
+        else:
+            self.errors[token] = status_code
+
+    def get(self, url, headers=None, params=None, stream=False,
+            timeout=None):
+        """Отвечает так же, как homework_statuses."""
+        token = (headers or {}).get('Authorization', '').split(' ')[-1]
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if token in self.errors:
+                return FakeResponse(self.errors[token], {'code': 'error'})
+            from_date = int((params or {}).get('from_date') or 0)
+            works = sorted(
+                (
+                    work for work in self.homeworks.get(token, {}).values()
+                    if work['updated'] >= from_date
+                ),
+                key=lambda work: work['updated'],
+                reverse=True,
+            )
+            data = {
+                'homeworks': [
+                    {key: value for key, value in work.items()
+                     if key != 'updated'}
+                    for work in works
+                ],
+                'current_date': self.now,
+            }
+        return FakeResponse(HTTPStatus.OK, data)
+
+
+class FakeMessage:
+    """Отправленное сообщение."""
+
+    def __init__(self, message_id, chat_id, text):
+        self.message_id = message_id
+        self.chat_id = chat_id
+        self.text = text
+
+
+class FakeBot:
+    """Заглушка telegram.Bot, запоминающая отправленные сообщения."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, token=None, keep=None, **kwargs):
+        self.token = token
+        self.messages = collections.deque(maxlen=keep)
+        self.sent = 0
+
+    def get_me(self):
+        """Возвращает описание бота."""
+        return {'id': self.token, 'is_bot': True}
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Сохраняет сообщение и возвращает его."""
+        message = FakeMessage(next(self._ids), chat_id, text)
+        self.messages.append(message)
+        self.sent += 1
+        return message
+
+
+class FakeTelegram:
+    """Фабрика FakeBot: один бот на токен, общий список сообщений.
+
+    keep ограничивает число хранимых сообщений у каждого бота.
+    """
+
+    def __init__(self, keep=None):
+        self.keep = keep
+        self.bots = {}
+
+    def __call__(self, token=None, **kwargs):
+        if token not in self.bots:
+            self.bots[token] = FakeBot(token=token, keep=self.keep)
+        return self.bots[token]
+
+    @property
+    def sent(self):
+        """Сколько сообщений отправлено всеми ботами."""
+        return sum(bot.sent for bot in self.bots.values())
+
+    @property
+    def messages(self):
+        """Все сообщения, отправленные любым ботом."""
+        return [
+            message for bot in self.bots.values() for message in bot.messages
+        ]
+
+
+default_transport = HttpTransport()
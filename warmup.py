@@ -0,0 +1,138 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+import requests
+
+import profiling
+import ratelimit
+
+logger = logging.getLogger(__name__)
+
+# Оба механизма включаются явно: прогрев тратит запросы к API,
+# а кэш DNS подменяет socket.getaddrinfo во всём процессе.
+DNS_CACHE_TTL = int(os.getenv('DNS_CACHE_TTL', 0))
+WARMUP_LEAD = float(os.getenv('WARMUP_LEAD', 0))
+WARMUP_TIMEOUT = 10
+
+
+class DnsCache:
+    """Кэш socket.getaddrinfo с временем жизни записей.
+
+    После install() им пользуются все HTTP-клиенты процесса, включая
+    клиент Telegram. Ошибки разрешения имён не кэшируются.
+    """
+
+    def __init__(self, ttl=DNS_CACHE_TTL, resolve=socket.getaddrinfo):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._resolve = resolve
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key):
+        result = self._resolve(*key)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Замена socket.getaddrinfo, отвечающая из кэша."""
+        key = (host, port, family, type, proto, flags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+        return self._store(key)
+
+    def refresh(self, horizon=0):
+        """Заново разрешает имена, записи которых истекут за horizon сек."""
+        deadline = time.monotonic() + horizon
+        with self._lock:
+            stale = [
+                key for key, (expires, _) in self._entries.items()
+                if expires <= deadline
+            ]
+        for key in stale:
+            try:
+                self._store(key)
+            except OSError as error:
+                logger.warning(f'Не удалось разрешить {key[0]}: {error}')
+        return len(stale)
+
+    def install(self):
+        """Подменяет socket.getaddrinfo кэширующей версией."""
+        socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        """Возвращает исходный socket.getaddrinfo."""
+        socket.getaddrinfo = self._resolve
+
+
+def connection_stats(session):
+    """Сколько запросов сессии обошлось без нового соединения."""
+    sent = opened = 0
+    # Один адаптер может быть смонтирован на несколько схем.
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                sent += pool.num_requests
+                opened += pool.num_connections
+    return {
+        'requests': sent,
+        'connections': opened,
+        'reuse': 1 - opened / sent if sent else 0.0,
+    }
+
+
+class Warmer:
+    """Прогревает DNS и соединения перед очередным опросом.
+
+    Незадолго до запланированного опроса обновляет истекающие записи
+    DNS и отправляет HEAD на каждый адрес API через общую сессию, чтобы
+    в пуле было живое соединение с уже пройденным TLS-рукопожатием.
+    targets сопоставляет адресу заголовки авторизации пользователя.
+    HEAD — такой же запрос к API, как опрос, поэтому он берёт токен
+    общего лимита, а без свободного токена прогрев пропускается.
+    """
+
+    def __init__(self, session, targets, dns=None, lead=WARMUP_LEAD):
+        self.session = session
+        self.targets = dict(targets)
+        self.dns = dns
+        self.lead = lead
+        self.skipped = 0
+
+    def warm(self):
+        """Прогревает соединения со всеми адресами."""
+        if self.dns:
+            self.dns.refresh(self.lead + WARMUP_TIMEOUT)
+        for url, headers in self.targets.items():
+            if ratelimit.limiter and ratelimit.limiter.try_acquire():
+                self.skipped += 1
+                logger.debug(f'Прогрев {url} пропущен: нет токена лимита.')
+                continue
+            try:
+                with profiling.span('warmup'):
+                    self.session.head(
+                        url, headers=headers, timeout=WARMUP_TIMEOUT
+                    ).close()
+            except requests.RequestException as error:
+                logger.warning(f'Прогрев {url} не удался: {error}')
+
+    def stats(self):
+        """Доля переиспользованных соединений и попадания в кэш DNS."""
+        stats = connection_stats(self.session)
+        stats['warmup_skipped'] = self.skipped
+        if self.dns:
+            stats['dns_hits'] = self.dns.hits
+            stats['dns_misses'] = self.dns.misses
+        return stats